@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Batch vocabulary analysis of many corpora
+
+Usage:
+    python batch_analysis.py manifest.json [--workers N] [--memory-budget MB]
+                                           [--output-dir DIR] [--offline]
+                                           [--download-nltk]
+
+The manifest lists the corpora to analyze:
+
+    {
+      "output_dir": "batch_results",
+      "corpora": [
+        {"name": "war_and_peace_en", "language": "english",
+         "source": "https://www.gutenberg.org/files/2600/2600-0.txt"},
+        {"name": "war_and_peace_ta", "language": "tamil",
+         "source": "tamil_text.txt", "profile": "compact"}
+      ]
+    }
+
+`source` is a local path or a URL (fetched through the download cache),
+`language` is english or tamil and `profile` picks how the vocabulary is
+built (see PROFILES; default "default"). English corpora may set
+"tokenizer": "regex" for the single-pass tokenizer, Tamil corpora "stem": true
+to strip inflectional suffixes before counting. Downloads happen first, one at a
+time; the corpora are then analyzed on a process pool, starting a corpus
+only while the estimated memory of the running ones stays within the
+budget. Results go to <output_dir>/<name>/ and a combined comparison
+report to <output_dir>/batch_report.txt (plus batch_summary.json).
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from download_cache import DownloadCache, DownloadError
+from stage_cache import StageCache, digest_text
+
+# Preprocessing profiles. memory_factor is the estimated peak memory per
+# byte of source text, used for admission against the memory budget.
+PROFILES = {
+    # Full token list in memory: TF-IDF over chapters, largest footprint
+    'default': {'compact': False, 'streaming': False, 'memory_factor': 20},
+    # Tokens interned into a uint32 array: same results, less memory
+    'compact': {'compact': True, 'streaming': False, 'memory_factor': 8},
+    # Counts only (no token stream, TF instead of TF-IDF), decoding the
+    # memory-mapped source one chunk at a time
+    'streaming': {'compact': False, 'streaming': True, 'memory_factor': 1},
+}
+
+LANGUAGES = ('english', 'tamil')
+
+DEFAULT_MEMORY_BUDGET_MB = 4096
+
+
+class Job:
+    """One corpus to analyze: its manifest entry, local text file and memory estimate"""
+
+    def __init__(self, spec, path, encoding, output_dir):
+        self.spec = spec
+        self.name = spec['name']
+        self.path = path
+        self.encoding = encoding
+        self.output_dir = output_dir
+        self.estimate = os.path.getsize(path) * PROFILES[spec['profile']]['memory_factor']
+
+
+def load_manifest(path):
+    """Read and validate a batch manifest; fills in default profiles"""
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    corpora = manifest.get('corpora')
+    if not corpora:
+        raise ValueError(f"{path} lists no corpora")
+
+    names = set()
+    for i, spec in enumerate(corpora):
+        for field in ('name', 'source', 'language'):
+            if field not in spec:
+                raise ValueError(f"Corpus {i} in {path} has no '{field}'")
+        if spec['name'] in names:
+            raise ValueError(f"Duplicate corpus name '{spec['name']}' in {path}")
+        names.add(spec['name'])
+        if spec['language'] not in LANGUAGES:
+            raise ValueError(f"Corpus '{spec['name']}': unsupported language "
+                             f"'{spec['language']}' (expected one of {', '.join(LANGUAGES)})")
+        spec.setdefault('profile', 'default')
+        if spec['profile'] not in PROFILES:
+            raise ValueError(f"Corpus '{spec['name']}': unknown profile '{spec['profile']}' "
+                             f"(expected one of {', '.join(PROFILES)})")
+    return manifest
+
+
+def resolve_source(spec, download_cache):
+    """Local path and encoding of a corpus, downloading URLs through the cache"""
+    source = spec['source']
+    if source.startswith(('http://', 'https://')):
+        path = download_cache.fetch(source)
+        return path, download_cache.metadata(source).get('encoding') or 'utf-8'
+    if not os.path.exists(source):
+        raise DownloadError(f"{source} does not exist")
+    return source, spec.get('encoding', 'utf-8')
+
+
+def analyze_corpus(job):
+    """
+    Analyze one corpus in a worker process and return its summary.
+    The source is memory-mapped and only its Gutenberg body is decoded
+    (chunk by chunk in the streaming profile). The vocabulary stage goes
+    through the stage cache, so the default profile shares cached results
+    with main().
+    """
+    # Imported here so the scheduler process stays light
+    from mapped_text import MappedText
+    from nlp_vocabulary_analysis import (LEMMA_CACHE_PATH, LemmaCache, TamilStemmer,
+                                         VocabularyAnalyzer, run_results_stage)
+
+    start = time.perf_counter()
+    spec = job.spec
+    language = spec['language']
+    profile = PROFILES[spec['profile']]
+    print(f"[{job.name}] Analyzing {spec['source']} ({language}, {spec['profile']} profile)")
+
+    # Workers only read the shared lemma cache; the lemmas they add are
+    # returned and saved once by the scheduler (see run_batch)
+    lemma_cache = LemmaCache(path=LEMMA_CACHE_PATH) if language == 'english' else None
+    known_lemmas = set(lemma_cache.entries) if lemma_cache is not None else set()
+    analyzer = VocabularyAnalyzer(language=language, lemma_cache=lemma_cache,
+                                  compact=profile['compact'], tokenizer=spec.get('tokenizer'),
+                                  stemmer=TamilStemmer() if spec.get('stem') else None)
+    cache = StageCache()
+    config = analyzer.preprocess_config()
+    if spec['profile'] != 'default':
+        config['profile'] = spec['profile']
+
+    with MappedText(job.path, job.encoding) as source:
+        if profile['streaming']:
+            text_digest = source.body_digest()
+        else:
+            analyzer.raw_text = source.read_body()
+            text_digest = digest_text(analyzer.raw_text)
+
+        def analyze():
+            if profile['streaming']:
+                analyzer.build_vocabulary_streaming(source)
+            else:
+                if language == 'tamil':
+                    analyzer.preprocess_tamil()
+                else:
+                    analyzer.preprocess_english()
+                analyzer.build_vocabulary()
+            return analyzer
+
+        results = run_results_stage(cache, f'{language}_vocabulary', text_digest, config,
+                                    analyze, job.output_dir)
+
+    return {
+        'name': job.name,
+        'source': spec['source'],
+        'language': language,
+        'profile': spec['profile'],
+        'normalization': results.normalization,
+        'results': job.output_dir,
+        'token_count': results.token_count,
+        'vocab_size': results.vocab_size,
+        'ttr': results.calculate_lexical_diversity(),
+        'top_words': results.get_top_words(10),
+        'top_tfidf_words': results.get_top_tfidf_words(10),
+        'seconds': time.perf_counter() - start,
+        'lemma_entries': [(token, lemma) for token, lemma in lemma_cache.entries.items()
+                          if token not in known_lemmas] if lemma_cache is not None else [],
+    }
+
+
+def run_batch(jobs, workers, memory_budget, lemma_cache=None):
+    """
+    Run jobs on a process pool of `workers` processes. A job starts only
+    while the memory estimates of running jobs plus its own fit in
+    memory_budget (bytes); later jobs that fit may start before an earlier
+    one that does not. A job over the whole budget runs on its own.
+    The lemmas each job computed are merged into lemma_cache, if given.
+    Returns (summaries in manifest order, {name: error message}).
+    """
+    pending = list(jobs)
+    running = {}
+    in_use = 0
+    summaries = {}
+    errors = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while pending or running:
+            for job in list(pending):
+                if len(running) >= workers:
+                    break
+                if running and in_use + job.estimate > memory_budget:
+                    continue
+                if job.estimate > memory_budget:
+                    print(f"Warning: {job.name} needs about {job.estimate / 2**20:,.0f} MB, "
+                          f"over the {memory_budget / 2**20:,.0f} MB budget; running it alone")
+                running[executor.submit(analyze_corpus, job)] = job
+                in_use += job.estimate
+                pending.remove(job)
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                job = running.pop(future)
+                in_use -= job.estimate
+                try:
+                    summaries[job.name] = future.result()
+                    lemma_entries = summaries[job.name].pop('lemma_entries')
+                    if lemma_cache is not None:
+                        lemma_cache.update(lemma_entries)
+                    print(f"[{job.name}] Done in {summaries[job.name]['seconds']:.1f}s")
+                except Exception as e:
+                    errors[job.name] = f"{type(e).__name__}: {e}"
+                    print(f"[{job.name}] Failed: {errors[job.name]}")
+
+    return [summaries[job.name] for job in jobs if job.name in summaries], errors
+
+
+def generate_batch_report(summaries, errors, path):
+    """Write the combined comparison report for all corpora"""
+    report = []
+    report.append("=" * 80)
+    report.append("BATCH VOCABULARY ANALYSIS")
+    report.append(f"{len(summaries)} corpora analyzed, {len(errors)} failed")
+    report.append("=" * 80)
+    report.append("")
+
+    report.append("1. BASIC STATISTICS")
+    report.append("-" * 80)
+    report.append(f"{'Corpus':<24} {'Language':<9} {'Profile':<10} {'Tokens':>12} "
+                  f"{'Vocabulary':>11} {'TTR':>8}")
+    report.append("-" * 80)
+    for s in summaries:
+        report.append(f"{s['name'][:24]:<24} {s['language']:<9} {s['profile']:<10} "
+                      f"{s['token_count']:>12,} {s['vocab_size']:>11,} {s['ttr']:>8.4f}")
+    report.append("")
+
+    report.append("2. TOP 10 WORDS PER CORPUS")
+    report.append("-" * 80)
+    for s in summaries:
+        report.append(f"{s['name']}:")
+        report.append("  frequency: " + ", ".join(f"{w} ({c:,})" for w, c in s['top_words'].items()))
+        if s['top_tfidf_words']:
+            report.append("  TF-IDF:    " + ", ".join(s['top_tfidf_words']))
+    report.append("")
+
+    report.append("3. COMPARATIVE ANALYSIS")
+    report.append("-" * 80)
+    for language in LANGUAGES:
+        group = [s for s in summaries if s['language'] == language]
+        if len(group) < 2:
+            continue
+        richest = max(group, key=lambda s: s['ttr'])
+        largest = max(group, key=lambda s: s['vocab_size'])
+        report.append(f"• {language.capitalize()}: {len(group)} corpora")
+        report.append(f"  Largest vocabulary: {largest['name']} ({largest['vocab_size']:,} words)")
+        report.append(f"  Highest TTR: {richest['name']} ({richest['ttr']:.4f})")
+    if summaries:
+        by_ttr = sorted(summaries, key=lambda s: s['ttr'], reverse=True)
+        report.append("• All corpora by lexical diversity (TTR): " +
+                      ", ".join(f"{s['name']} {s['ttr']:.4f}" for s in by_ttr))
+    unstemmed = [s['name'] for s in summaries
+                 if s['language'] == 'tamil' and s.get('normalization') != 'stemmed']
+    if unstemmed and any(s['language'] == 'english' for s in summaries):
+        report.append(f"• Note: {', '.join(unstemmed)} count every inflected Tamil form as its own")
+        report.append("  word while English is lemmatized; set \"stem\": true to compare stems")
+    report.append("")
+
+    if errors:
+        report.append("4. FAILED CORPORA")
+        report.append("-" * 80)
+        for name, error in errors.items():
+            report.append(f"{name}: {error}")
+        report.append("")
+    report.append("=" * 80)
+
+    report_text = '\n'.join(report)
+    print("\n" + report_text)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(report_text)
+    print(f"\nReport saved to '{path}'")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('manifest', help='JSON manifest of corpora')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='worker processes (default: CPU count)')
+    parser.add_argument('--memory-budget', type=int, default=DEFAULT_MEMORY_BUDGET_MB,
+                        help=f'memory budget in MB for concurrently running corpora '
+                             f'(default: {DEFAULT_MEMORY_BUDGET_MB})')
+    parser.add_argument('--output-dir', help='results directory (overrides the manifest)')
+    parser.add_argument('--offline', action='store_true',
+                        help='only use already downloaded sources')
+    parser.add_argument('--download-nltk', action='store_true',
+                        help='download missing NLTK data before analyzing English corpora')
+    args = parser.parse_args()
+
+    manifest = load_manifest(args.manifest)
+    output_dir = args.output_dir or manifest.get('output_dir', 'batch_results')
+    os.makedirs(output_dir, exist_ok=True)
+
+    missing_nltk = []
+    if any(spec['language'] == 'english' for spec in manifest['corpora']):
+        from nlp_vocabulary_analysis import check_nltk_resources
+        missing_nltk = check_nltk_resources(download=args.download_nltk and not args.offline)
+
+    # Fetch sources one at a time so concurrent jobs never race on the
+    # download cache; the sizes also give the memory estimates
+    download_cache = DownloadCache(offline=args.offline)
+    jobs = []
+    errors = {}
+    for spec in manifest['corpora']:
+        if spec['language'] == 'english' and missing_nltk:
+            errors[spec['name']] = f"Missing NLTK data: {', '.join(missing_nltk)} (use --download-nltk)"
+            print(f"[{spec['name']}] Skipped: {errors[spec['name']]}")
+            continue
+        try:
+            path, encoding = resolve_source(spec, download_cache)
+        except DownloadError as e:
+            errors[spec['name']] = f"DownloadError: {e}"
+            print(f"[{spec['name']}] Skipped: {e}")
+            continue
+        jobs.append(Job(spec, path, encoding, os.path.join(output_dir, spec['name'])))
+
+    print(f"Analyzing {len(jobs)} corpora on {args.workers} workers "
+          f"(memory budget {args.memory_budget:,} MB)...")
+    lemma_cache = None
+    if any(job.spec['language'] == 'english' for job in jobs):
+        from nlp_vocabulary_analysis import LEMMA_CACHE_PATH, LemmaCache
+        lemma_cache = LemmaCache(path=LEMMA_CACHE_PATH)
+    summaries, run_errors = run_batch(jobs, args.workers, args.memory_budget * 2**20, lemma_cache)
+    errors.update(run_errors)
+    if lemma_cache is not None:
+        # Saved once here, so concurrent workers never write the same file
+        lemma_cache.save()
+
+    with open(os.path.join(output_dir, 'batch_summary.json'), 'w', encoding='utf-8') as f:
+        json.dump({'corpora': summaries, 'errors': errors}, f, indent=2, ensure_ascii=False)
+    generate_batch_report(summaries, errors, os.path.join(output_dir, 'batch_report.txt'))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,776 @@
+#!/usr/bin/env python3
+"""
+Performance benchmarks for the vocabulary analysis pipeline
+
+Usage:
+    python benchmarks.py tamil-cleaner [--copies N]
+    python benchmarks.py tamil-stemmer [--copies N]
+    python benchmarks.py sketch-accuracy [--width W] [--depth D] [--top-k K] [--precision P]
+    python benchmarks.py import-time [--budget SECONDS] [--repeat N]
+    python benchmarks.py stages [--sizes MB [MB ...]] [--languages LANG [LANG ...]]
+                                [--output FILE] [--compare BASELINE] [--no-memory]
+    python benchmarks.py tokenizer-parity [--source PATH] [--offline] [--max-divergence F]
+    python benchmarks.py parallel [--workers N [N ...]] [--language LANG] [--size MB]
+                                  [--source PATH] [--repeat N]
+"""
+
+import argparse
+import contextlib
+import difflib
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+
+import numpy as np
+
+import nlp_vocabulary_analysis
+from download_cache import DownloadCache
+from nlp_vocabulary_analysis import (FakeTranslationBackend, TextTranslator, VocabularyAnalyzer,
+                                     check_nltk_resources, clean_tamil_chunk, iter_text_chunks)
+from regex_tokenizer import RegexTokenizer, punkt_abbreviations
+from results_store import load_results
+from sketches import VocabularySketch
+from tamil_stemmer import TamilStemmer
+from tfidf import split_chapters
+
+WAR_AND_PEACE_URL = "https://www.gutenberg.org/files/2600/2600-0.txt"
+
+# Size of the War and Peace plain text on Project Gutenberg, in MB
+WAR_AND_PEACE_MB = 3.2
+
+
+def clean_tamil_per_token(text, min_length=2):
+    """The original preprocess_tamil loop: one re.sub call per whitespace token"""
+    cleaned_tokens = []
+    for token in text.split():
+        cleaned_token = re.sub(r'[^\u0B80-\u0BFF]+', '', token)
+        if len(cleaned_token) >= min_length:
+            cleaned_tokens.append(cleaned_token)
+    return cleaned_tokens
+
+
+def clean_tamil_bulk(text, min_length=2):
+    """The single-pass cleaner over paragraph-aligned chunks"""
+    cleaned_tokens = []
+    for chunk in iter_text_chunks(text):
+        cleaned_tokens.extend(clean_tamil_chunk(chunk, min_length))
+    return cleaned_tokens
+
+
+def best_time(function, *args, repeat=3):
+    """Best wall time of `repeat` runs, plus the last result"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def bench_tamil_cleaner(copies=200):
+    """
+    Compare the per-token and single-pass Tamil cleaners on a full-book
+    sized corpus built by repeating the cached translation.
+    """
+    with open('tamil_text.txt', 'r', encoding='utf-8') as f:
+        text = '\n\n'.join([f.read()] * copies)
+    print(f"Corpus: {len(text):,} characters ({copies} copies of tamil_text.txt)")
+
+    old_time, old_tokens = best_time(clean_tamil_per_token, text)
+    new_time, new_tokens = best_time(clean_tamil_bulk, text)
+
+    if old_tokens != new_tokens:
+        raise AssertionError("Single-pass cleaner output differs from the per-token loop")
+
+    print(f"{'per-token re.sub':<20} {old_time:>8.3f}s")
+    print(f"{'single-pass regex':<20} {new_time:>8.3f}s")
+    print(f"Speedup: {old_time / new_time:.1f}x, identical output ({len(new_tokens):,} tokens)")
+
+
+def bench_tamil_stemmer(copies=200):
+    """
+    Throughput of the fused Tamil token stream with and without the
+    stemmer on the tamil-cleaner corpus, plus the cost of stemming forms
+    the memo has not seen yet (the distinct words of a synthetic corpus).
+    """
+    with open('tamil_text.txt', 'r', encoding='utf-8') as f:
+        text = '\n\n'.join([f.read()] * copies)
+    size_mb = len(text.encode('utf-8')) / 1024 / 1024
+    print(f"Corpus: {size_mb:.1f} MB ({copies} copies of tamil_text.txt)")
+
+    def count(stemmer):
+        analyzer = VocabularyAnalyzer('tamil', stemmer=stemmer)
+        return Counter(analyzer.iter_tamil_tokens(iter_text_chunks(text)))
+
+    plain_time, plain = best_time(count, None)
+    stemmer = TamilStemmer()
+    stem_time, stemmed = best_time(count, stemmer)
+    print(f"{'surface forms':<20} {plain_time:>8.3f}s  {size_mb / plain_time:>7.1f} MB/s  "
+          f"{len(plain):,} types")
+    print(f"{'stemmed':<20} {stem_time:>8.3f}s  {size_mb / stem_time:>7.1f} MB/s  "
+          f"{len(stemmed):,} types")
+    print(f"Stemming overhead: {stem_time / plain_time - 1:+.1%}")
+
+    forms = sorted(set(clean_tamil_chunk(load_corpus('tamil', 1))))
+    cold_time, _ = best_time(TamilStemmer().stem_tokens, forms, repeat=1)
+    print(f"Uncached: {len(forms):,} distinct forms in {cold_time:.3f}s "
+          f"({len(forms) / cold_time:,.0f} forms/s)")
+
+
+def bench_sketch_accuracy(width=2 ** 16, depth=4, top_k=1000, precision=14):
+    """
+    Check sketch-mode counting against the exact counts of the saved
+    English and Tamil results (their token streams are replayed).
+    """
+    for name in ('english_results', 'tamil_results'):
+        results = load_results(name)
+        id_to_word = results.id_to_word
+        tokens = (id_to_word[i] for i in results.token_ids.tolist())
+
+        sketch = VocabularySketch(width, depth, top_k, precision)
+        start = time.perf_counter()
+        sketch.update(tokens)
+        elapsed = time.perf_counter() - start
+
+        exact_top = results.get_top_words(20)
+        sketch_top = dict(sketch.top_words(20))
+        recall = len(set(exact_top) & set(sketch_top)) / len(exact_top)
+        worst = max(abs(sketch.estimate_count(word) - count) / count
+                    for word, count in results.get_top_words(100).items())
+        vocab_error = (sketch.vocab_size() - results.vocab_size) / results.vocab_size
+        bounds = sketch.error_bounds()
+
+        print(f"{results.language}: {results.token_count:,} tokens in {elapsed:.2f}s, "
+              f"sketch memory {sketch.nbytes / 1024:.0f} KiB")
+        print(f"  vocab size   exact {results.vocab_size:,}  estimated {sketch.vocab_size():,}  "
+              f"error {vocab_error:+.2%} (std. error {bounds['vocab_size_relative_std_error']:.2%})")
+        print(f"  top-20 recall {recall:.0%}, worst relative count error in top 100 {worst:.2%} "
+              f"(bound +{bounds['count_additive_error']:.1f} tokens)")
+
+
+# Modules that must not be loaded just by importing the analysis module
+LAZY_MODULES = ('nltk', 'matplotlib', 'seaborn', 'pandas', 'sklearn', 'scipy',
+                'requests', 'deep_translator')
+
+IMPORT_PROBE = """
+import sys, time
+start = time.perf_counter()
+import nlp_vocabulary_analysis
+elapsed = time.perf_counter() - start
+loaded = [name for name in {modules!r} if name in sys.modules]
+print(elapsed, ','.join(loaded))
+"""
+
+
+def bench_import_time(budget=0.5, repeat=5):
+    """
+    Time `import nlp_vocabulary_analysis` in fresh interpreters and check it
+    against the budget (seconds, best of `repeat` runs). Also fails if a
+    heavy optional dependency gets imported eagerly. Returns True if the
+    import is within budget; main() exits with status 1 otherwise.
+    tests/test_import_time.py runs the same probe under pytest.
+    """
+    probe = IMPORT_PROBE.format(modules=LAZY_MODULES)
+    times = []
+    loaded = ''
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', probe], capture_output=True,
+                                text=True, check=True).stdout.split()
+        times.append(float(output[0]))
+        loaded = output[1] if len(output) > 1 else ''
+    best = min(times)
+
+    # One -X importtime run for the slowest modules imported directly by
+    # top-level imports (the package column is indented two spaces per level)
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+                             'import nlp_vocabulary_analysis'],
+                            capture_output=True, text=True, check=True).stderr
+    direct = []
+    for line in stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            name = parts[2].strip()
+            depth = (len(parts[2]) - len(parts[2].lstrip()) - 1) // 2
+            if depth == 1:
+                direct.append((int(parts[1]), name))
+
+    print(f"import nlp_vocabulary_analysis: best {best * 1000:.0f} ms of {repeat} runs "
+          f"(budget {budget * 1000:.0f} ms)")
+    print("Slowest direct imports:")
+    for cumulative, name in sorted(direct, reverse=True)[:5]:
+        print(f"  {name:<30} {cumulative / 1000:>8.1f} ms")
+
+    ok = True
+    if loaded:
+        print(f"FAIL: imported eagerly: {loaded.replace(',', ', ')}")
+        ok = False
+    if best > budget:
+        print(f"FAIL: import time over budget by {(best - budget) * 1000:.0f} ms")
+        ok = False
+    if ok:
+        print("OK")
+    return ok
+
+
+# Synthetic corpora for the stage benchmarks are cached here by language, size and seed
+CORPUS_DIR = os.path.join('.cache', 'bench_corpora')
+
+# Frequent English function words (all NLTK stopwords), ranked first in the
+# synthetic English vocabulary so stopword removal has work to do
+ENGLISH_FUNCTION_WORDS = ('the', 'and', 'to', 'of', 'a', 'he', 'in', 'his', 'that', 'was',
+                          'with', 'had', 'it', 'her', 'not', 'at', 'him', 'she', 'for', 'as',
+                          'on', 'but', 'is', 'i', 'you', 'all', 'said', 'be', 'they', 'by',
+                          'who', 'from', 'this', 'what', 'were', 'have', 'so', 'which', 'one',
+                          'there', 'them', 'their', 'an', 'been', 'would', 'when', 'or', 'if')
+
+ENGLISH_ONSETS = ('b', 'c', 'd', 'f', 'g', 'h', 'l', 'm', 'n', 'p', 'r', 's', 't', 'v', 'w',
+                  'br', 'ch', 'cl', 'dr', 'gr', 'pr', 'sh', 'st', 'th', 'tr')
+ENGLISH_VOWELS = ('a', 'e', 'i', 'o', 'u', 'ea', 'ai', 'ou', 'ee', 'oo')
+ENGLISH_CODAS = ('', '', '', 'n', 'r', 's', 't', 'l', 'nd', 'st', 'ck', 'ng')
+ENGLISH_SUFFIXES = ('', '', '', 's', 'ed', 'ing', 'es', 'ly')
+
+TAMIL_CONSONANTS = 'கஙசஞடணதநபமயரலவழளறன'
+# Inherent vowel (no sign) plus the dependent vowel signs
+TAMIL_VOWEL_SIGNS = ('', '\u0BBE', '\u0BBF', '\u0BC0', '\u0BC1', '\u0BC2', '\u0BC6',
+                     '\u0BC7', '\u0BC8', '\u0BCA', '\u0BCB')
+TAMIL_PULLI = '\u0BCD'
+
+# Synthetic vocabulary size (words are drawn from it by a Zipf-Mandelbrot law)
+SYNTHETIC_VOCABULARY = 200000
+ZIPF_EXPONENT = 1.07
+ZIPF_OFFSET = 2.7
+
+ROMAN_NUMERALS = ((1000, 'M'), (900, 'CM'), (500, 'D'), (400, 'CD'), (100, 'C'), (90, 'XC'),
+                  (50, 'L'), (40, 'XL'), (10, 'X'), (9, 'IX'), (5, 'V'), (4, 'IV'), (1, 'I'))
+
+
+def to_roman(number):
+    """Roman numeral for a positive integer (chapter headings)"""
+    numeral = ''
+    for value, symbol in ROMAN_NUMERALS:
+        count, number = divmod(number, value)
+        numeral += symbol * count
+    return numeral
+
+
+def synthetic_vocabulary(language, size=SYNTHETIC_VOCABULARY, seed=0):
+    """
+    `size` distinct pseudo-words in rank order. English words are built
+    from syllables with inflectional suffixes (so the lemmatizer has work)
+    after the function words; Tamil words are consonant + vowel-sign
+    syllables, some ending in a pulli.
+    """
+    rng = np.random.default_rng(seed)
+    words = list(ENGLISH_FUNCTION_WORDS) if language == 'english' else []
+    seen = set(words)
+    while len(words) < size:
+        syllables = rng.integers(1, 3, endpoint=True)
+        if language == 'english':
+            word = ''.join(ENGLISH_ONSETS[rng.integers(len(ENGLISH_ONSETS))]
+                           + ENGLISH_VOWELS[rng.integers(len(ENGLISH_VOWELS))]
+                           for _ in range(syllables))
+            word += ENGLISH_CODAS[rng.integers(len(ENGLISH_CODAS))]
+            word += ENGLISH_SUFFIXES[rng.integers(len(ENGLISH_SUFFIXES))]
+        else:
+            word = ''.join(TAMIL_CONSONANTS[rng.integers(len(TAMIL_CONSONANTS))]
+                           + TAMIL_VOWEL_SIGNS[rng.integers(len(TAMIL_VOWEL_SIGNS))]
+                           for _ in range(syllables))
+            if rng.random() < 0.4:
+                word += TAMIL_CONSONANTS[rng.integers(len(TAMIL_CONSONANTS))] + TAMIL_PULLI
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    return words
+
+
+def zipf_probabilities(size, exponent=ZIPF_EXPONENT, offset=ZIPF_OFFSET):
+    """Zipf-Mandelbrot word probabilities p(r) ~ 1 / (r + offset)**exponent"""
+    weights = 1.0 / (np.arange(1, size + 1) + offset) ** exponent
+    return weights / weights.sum()
+
+
+def generate_corpus(language, size_bytes, seed=0, chapter_words=5000):
+    """
+    Synthetic book of about `size_bytes` UTF-8 bytes: chapters of
+    `chapter_words` Zipf-distributed words under "CHAPTER XIV" /
+    "அத்தியாயம் XIV" headings, split into sentences and paragraphs.
+    """
+    words = np.array(synthetic_vocabulary(language, seed=seed), dtype=object)
+    probabilities = zipf_probabilities(len(words))
+    rng = np.random.default_rng(seed + 1)
+    heading = 'CHAPTER' if language == 'english' else 'அத்தியாயம்'
+
+    chapters = []
+    total = 0
+    while total < size_bytes:
+        tokens = words[rng.choice(len(words), size=chapter_words, p=probabilities)]
+        # Sentences of 5-25 words, paragraphs of five sentences on average
+        sentence_ends = np.cumsum(rng.integers(5, 26, size=chapter_words // 5))
+        sentence_ends = sentence_ends[sentence_ends < chapter_words] - 1
+        paragraph_ends = rng.random(len(sentence_ends)) < 0.2
+        for end, paragraph_end in zip(sentence_ends, paragraph_ends):
+            tokens[end] = tokens[end] + ('.\n\n' if paragraph_end else '.')
+            if language == 'english' and end + 1 < chapter_words:
+                tokens[end + 1] = tokens[end + 1].capitalize()
+        chapter = f"{heading} {to_roman(len(chapters) + 1)}\n\n" + ' '.join(tokens.tolist()) + '.\n\n'
+        chapters.append(chapter)
+        total += len(chapter.encode('utf-8'))
+    return ''.join(chapters)
+
+
+def load_corpus(language, size_mb, seed=0):
+    """Synthetic corpus of size_mb megabytes, generated once and cached in CORPUS_DIR"""
+    path = os.path.join(CORPUS_DIR, f'{language}_{size_mb:g}MB_seed{seed}.txt')
+    if not os.path.exists(path):
+        print(f"Generating {size_mb:g} MB {language} corpus...")
+        text = generate_corpus(language, int(size_mb * 1024 * 1024), seed)
+        os.makedirs(CORPUS_DIR, exist_ok=True)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(path + '.tmp', path)
+        return text
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def measure(function, *args, memory=True):
+    """
+    Run function(*args) once with the pipeline's progress output silenced.
+    Returns (result, wall seconds, CPU seconds, peak traced bytes or None).
+    """
+    if memory:
+        tracemalloc.start()
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            result = function(*args)
+    finally:
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        peak = tracemalloc.get_traced_memory()[1] if memory else None
+        if memory:
+            tracemalloc.stop()
+    return result, wall, cpu, peak
+
+
+class TimedWordTokenize:
+    """Wraps the module's word_tokenize to time tokenization inside preprocess_english"""
+
+    def __init__(self, tokenize):
+        self.tokenize = tokenize
+        self.seconds = 0.0
+
+    def __call__(self, text):
+        start = time.perf_counter()
+        try:
+            return self.tokenize(text)
+        finally:
+            self.seconds += time.perf_counter() - start
+
+
+def analyzer_stages(language, text, results_dir):
+    """(stage name, function) pairs for one analysis, sharing one analyzer"""
+    analyzer = VocabularyAnalyzer(language)
+    analyzer.raw_text = text
+    preprocess = analyzer.preprocess_english if language == 'english' else analyzer.preprocess_tamil
+    return analyzer, [
+        (f'preprocess_{language}', preprocess),
+        ('build_vocabulary', analyzer.build_vocabulary),
+        ('lexical_diversity', analyzer.lexical_diversity_profile),
+        ('save_results', lambda: analyzer.save_results(results_dir)),
+    ]
+
+
+# Size of the synthetic corpus of the discarded warm-up run, in bytes
+WARM_UP_BYTES = 64 * 1024
+
+
+def warm_up_stages(languages, missing, workdir, render=True, seed=0):
+    """
+    Run every stage once on a small corpus and discard the results, so
+    one-off costs (importing scikit-learn, SciPy, NLTK and matplotlib,
+    loading WordNet, finding fonts) are not charged to the first stage
+    that is measured
+    """
+    analyzers = {}
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for language in languages:
+            text = generate_corpus(language, WARM_UP_BYTES, seed)
+            if language == 'english':
+                TextTranslator(backend=FakeTranslationBackend(), rate=0).translate_text(text)
+                if missing:
+                    continue
+            results_dir = os.path.join(workdir, f'warm_up_{language}')
+            analyzer, stages = analyzer_stages(language, text, results_dir)
+            for _, function in stages:
+                function()
+            analyzers[language] = analyzer
+
+        if render and analyzers:
+            from plotting import render_figures
+
+            english = analyzers.get('english') or analyzers.get('tamil')
+            tamil = analyzers.get('tamil') or english
+            figures_dir = os.path.join(workdir, 'warm_up_figures')
+            os.makedirs(figures_dir, exist_ok=True)
+            render_figures(english, tamil, figures_dir, None, 1, True)
+
+
+def bench_stages(sizes=(1, 10), languages=('english', 'tamil'), output='bench_stages.json',
+                 memory=True, render=True, seed=0, warm_up=True):
+    """
+    Time (wall and CPU) and memory-profile every pipeline stage on
+    synthetic corpora of each size in MB: the VocabularyAnalyzer stages,
+    translate_text through FakeTranslationBackend, and figure rendering.
+    Peak memory is the tracemalloc peak of the stage, which slows the
+    stages down; use memory=False for clean timings. English stages are
+    skipped if NLTK data is missing. Unless warm_up=False, every stage
+    first runs once on a small corpus outside the timers (see
+    warm_up_stages). Results are written to `output` as JSON (see
+    compare_benchmarks).
+    """
+    missing = check_nltk_resources() if 'english' in languages else []
+    if missing:
+        print(f"NLTK data missing ({', '.join(missing)}): skipping English analysis stages")
+
+    records = []
+
+    def record(language, size_mb, stage, text_bytes, result, wall, cpu, peak, tokens=None):
+        entry = {
+            'language': language,
+            'size_mb': size_mb,
+            'stage': stage,
+            'seconds': round(wall, 6),
+            'cpu_seconds': round(cpu, 6),
+            'peak_bytes': peak,
+            'mb_per_second': round(text_bytes / 1024 / 1024 / wall, 3) if wall else None,
+            'tokens': tokens,
+        }
+        records.append(entry)
+        peak_text = f"{peak / 1024 / 1024:>9.1f} MiB" if peak is not None else ''
+        print(f"  {stage:<34} {wall:>9.3f}s  cpu {cpu:>9.3f}s {peak_text}")
+        return result
+
+    with tempfile.TemporaryDirectory() as workdir:
+        if warm_up:
+            print("Warming up (one discarded run on a small corpus)...")
+            start = time.perf_counter()
+            warm_up_stages(languages, missing, workdir, render, seed)
+            print(f"Warm-up took {time.perf_counter() - start:.2f}s")
+
+        for size_mb in sizes:
+            analyzers = {}
+            for language in languages:
+                text = load_corpus(language, size_mb, seed)
+                text_bytes = len(text.encode('utf-8'))
+                print(f"\n{language} {size_mb:g} MB ({text_bytes:,} bytes)")
+
+                if language == 'english':
+                    translator = TextTranslator(backend=FakeTranslationBackend(), rate=0)
+                    result = measure(translator.translate_text, text, None, None, memory=memory)
+                    record(language, size_mb, 'translate_text', text_bytes, *result)
+                    if missing:
+                        continue
+
+                results_dir = os.path.join(workdir, f'{language}_{size_mb:g}')
+                analyzer, stages = analyzer_stages(language, text, results_dir)
+                tokenize = nlp_vocabulary_analysis.word_tokenize
+                timed = nlp_vocabulary_analysis.word_tokenize = TimedWordTokenize(tokenize)
+                try:
+                    for stage, function in stages:
+                        result = measure(function, memory=memory)
+                        tokens = analyzer.token_count or len(analyzer.processed_tokens) or None
+                        record(language, size_mb, stage, text_bytes, *result, tokens=tokens)
+                        if stage == 'preprocess_english':
+                            # Tokenization time inside preprocessing (its memory is included above)
+                            record(language, size_mb, 'preprocess_english.word_tokenize',
+                                   text_bytes, None, timed.seconds, timed.seconds, None)
+                finally:
+                    nlp_vocabulary_analysis.word_tokenize = tokenize
+                analyzers[language] = analyzer
+
+            if render and analyzers:
+                from plotting import render_figures
+
+                # With one language analyzed, it stands in for the other
+                english = analyzers.get('english') or analyzers.get('tamil')
+                tamil = analyzers.get('tamil') or english
+                print(f"\nrendering {size_mb:g} MB")
+                result = measure(render_figures, english, tamil, workdir, None, 1, True,
+                                 memory=memory)
+                record('both', size_mb, 'render_figures', 0, *result)
+
+    report = {
+        'benchmark': 'stages',
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'seed': seed,
+        'memory_traced': memory,
+        'warmed_up': warm_up,
+        'nltk_missing': missing,
+        'results': records,
+    }
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+    return report
+
+
+def compare_benchmarks(report, baseline_path, tolerance=0.2):
+    """
+    Compare stage times with a baseline results file. Returns False if any
+    stage present in both is more than `tolerance` (a fraction) slower.
+    """
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    key = lambda entry: (entry['language'], entry['size_mb'], entry['stage'])
+    before = {key(entry): entry['seconds'] for entry in baseline['results']}
+
+    print(f"\nComparison with {baseline_path} (tolerance {tolerance:.0%}):")
+    ok = True
+    for entry in report['results']:
+        old = before.get(key(entry))
+        if not old:
+            continue
+        change = entry['seconds'] / old - 1
+        flag = 'REGRESSION' if change > tolerance else ''
+        print(f"  {entry['language']:<8} {entry['size_mb']:>7g} MB  {entry['stage']:<34} "
+              f"{old:>9.3f}s -> {entry['seconds']:>9.3f}s  {change:+7.1%} {flag}")
+        if flag:
+            ok = False
+    print("OK" if ok else "FAIL: stages slower than the baseline")
+    return ok
+
+
+def bench_tokenizer_parity(source=None, offline=False, max_divergence=0.001, examples=15):
+    """
+    Compare the regex tokenizer with word_tokenize on War and Peace (or
+    the text file `source`), chapter by chapter as preprocess_english
+    tokenizes it. word_tokenize output is filtered to the alphabetic tokens
+    the pipeline keeps; the two token sequences are aligned with difflib
+    and every differing span is reported. Returns True if the share of
+    divergent tokens is at most max_divergence.
+    """
+    missing = check_nltk_resources()
+    if 'punkt_tab' in missing:
+        print("NLTK punkt_tab data is missing: word_tokenize cannot run "
+              "(python nlp_vocabulary_analysis.py --download-nltk)")
+        return False
+
+    analyzer = VocabularyAnalyzer('english')
+    if source:
+        analyzer.load_text(source)
+    elif not analyzer.download_text(WAR_AND_PEACE_URL, DownloadCache(offline=offline), clean=True):
+        return False
+
+    min_length = analyzer.min_token_length
+    regex = RegexTokenizer(min_length, punkt_abbreviations())
+    reference_time = regex_time = 0.0
+    reference_count = divergent = 0
+    spans = Counter()
+    reference_types, regex_types = set(), set()
+
+    for _, chapter in split_chapters(analyzer.raw_text):
+        text = chapter.lower()
+        start = time.perf_counter()
+        expected = [token for token in nlp_vocabulary_analysis.word_tokenize(text)
+                    if token.isalpha() and len(token) >= min_length]
+        reference_time += time.perf_counter() - start
+        start = time.perf_counter()
+        actual = regex(text)
+        regex_time += time.perf_counter() - start
+
+        reference_count += len(expected)
+        reference_types.update(expected)
+        regex_types.update(actual)
+        matcher = difflib.SequenceMatcher(None, expected, actual, autojunk=False)
+        for op, i1, i2, j1, j2 in matcher.get_opcodes():
+            if op != 'equal':
+                divergent += max(i2 - i1, j2 - j1)
+                spans[(' '.join(expected[i1:i2]), ' '.join(actual[j1:j2]))] += 1
+
+    rate = divergent / reference_count if reference_count else 0.0
+    print(f"{'word_tokenize':<16} {reference_time:>8.3f}s  {reference_count:,} tokens")
+    print(f"{'regex':<16} {regex_time:>8.3f}s  "
+          f"({reference_time / regex_time if regex_time else 0:.1f}x faster)")
+    print(f"Divergent tokens: {divergent:,} ({rate:.4%}, limit {max_divergence:.4%})")
+    print(f"Vocabulary: {len(reference_types - regex_types)} types only from word_tokenize, "
+          f"{len(regex_types - reference_types)} only from regex")
+    if spans:
+        print("Most frequent differences (word_tokenize -> regex):")
+        for (expected, actual), count in spans.most_common(examples):
+            print(f"  {count:>5}  {expected or '-'!r:<30} -> {actual or '-'!r}")
+
+    ok = rate <= max_divergence
+    print("OK" if ok else "FAIL: regex tokenizer diverges from word_tokenize")
+    return ok
+
+
+def bench_parallel(workers=(1, 2, 4, 8), language='english', size_mb=WAR_AND_PEACE_MB,
+                   source=None, repeat=3, seed=0):
+    """
+    Wall time of build_vocabulary_parallel for each worker count on a
+    War and Peace sized synthetic corpus (or the text file `source`, read
+    through load_text like a real run, so CRLF line endings are kept and
+    a Gutenberg header is skipped), with the speedup over one worker. Every vocabulary is checked against
+    the serial preprocess_* + build_vocabulary path; returns True if all
+    are identical.
+    """
+    if language == 'english':
+        missing = check_nltk_resources()
+        if missing:
+            print(f"NLTK data missing ({', '.join(missing)}): cannot preprocess English "
+                  "(python nlp_vocabulary_analysis.py --download-nltk)")
+            return False
+
+    if source:
+        text = VocabularyAnalyzer(language).load_text(source)
+    else:
+        text = load_corpus(language, size_mb, seed)
+    size_mb = len(text.encode('utf-8')) / 1024 / 1024
+    cpus = os.cpu_count() or 1
+    print(f"Corpus: {language} {size_mb:.1f} MB, {cpus} CPUs")
+
+    def serial():
+        analyzer = VocabularyAnalyzer(language)
+        analyzer.raw_text = text
+        if language == 'tamil':
+            analyzer.preprocess_tamil()
+        else:
+            analyzer.preprocess_english()
+        analyzer.build_vocabulary()
+        return analyzer
+
+    def parallel(count):
+        analyzer = VocabularyAnalyzer(language)
+        analyzer.raw_text = text
+        analyzer.build_vocabulary_parallel(workers=count)
+        return analyzer
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        # The first run is not timed: it pays for importing scikit-learn and SciPy
+        expected = serial()
+        serial_time, _ = best_time(serial, repeat=repeat)
+    print(f"{'serial':<12} {serial_time:>8.3f}s  {expected.token_count:,} tokens, "
+          f"{expected.vocab_size:,} types")
+
+    ok = True
+    base = None
+    for count in workers:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            elapsed, analyzer = best_time(parallel, count, repeat=repeat)
+        base = base or elapsed
+        identical = (analyzer.vocabulary == expected.vocabulary
+                     and analyzer.id_to_word == expected.id_to_word)
+        ok = ok and identical
+        print(f"{f'{count} workers':<12} {elapsed:>8.3f}s  speedup {base / elapsed:>5.2f}x  "
+              f"efficiency {base / elapsed / count:>4.0%}  "
+              f"{'identical' if identical else 'DIFFERENT vocabulary'}")
+    if max(workers) > cpus:
+        print(f"Note: only {cpus} CPUs, so more workers cannot run in parallel")
+
+    print("OK" if ok else "FAIL: parallel vocabulary differs from the serial path")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    tamil = subparsers.add_parser('tamil-cleaner', help='per-token vs single-pass Tamil cleaning')
+    tamil.add_argument('--copies', type=int, default=200,
+                       help='copies of tamil_text.txt in the corpus (default: 200)')
+
+    stemmer = subparsers.add_parser('tamil-stemmer', help='Tamil token stream with and without stemming')
+    stemmer.add_argument('--copies', type=int, default=200,
+                         help='copies of tamil_text.txt in the corpus (default: 200)')
+
+    sketch = subparsers.add_parser('sketch-accuracy',
+                                   help='sketch-mode counting vs exact counts on the saved results')
+    sketch.add_argument('--width', type=int, default=2 ** 16, help='Count-Min width')
+    sketch.add_argument('--depth', type=int, default=4, help='Count-Min depth')
+    sketch.add_argument('--top-k', type=int, default=1000, help='heavy hitters to keep')
+    sketch.add_argument('--precision', type=int, default=14, help='HyperLogLog precision')
+
+    imports = subparsers.add_parser('import-time',
+                                    help='import time of the analysis module against a budget')
+    imports.add_argument('--budget', type=float, default=0.5,
+                         help='maximum import time in seconds (default: 0.5)')
+    imports.add_argument('--repeat', type=int, default=5, help='fresh interpreters to time')
+
+    stages = subparsers.add_parser('stages',
+                                   help='time and memory-profile each stage on synthetic corpora')
+    stages.add_argument('--sizes', type=float, nargs='+', default=[1, 10],
+                        help='corpus sizes in MB, e.g. 1 10 100 1000 (default: 1 10)')
+    stages.add_argument('--languages', nargs='+', choices=['english', 'tamil'],
+                        default=['english', 'tamil'], help='corpora to generate')
+    stages.add_argument('--output', default='bench_stages.json',
+                        help='JSON results file (default: bench_stages.json)')
+    stages.add_argument('--seed', type=int, default=0, help='corpus generator seed')
+    stages.add_argument('--no-memory', action='store_true',
+                        help='skip tracemalloc (faster, undisturbed timings)')
+    stages.add_argument('--no-render', action='store_true', help='skip figure rendering')
+    stages.add_argument('--no-warm-up', action='store_true',
+                        help='include one-off import and data loading costs in the first stages')
+    stages.add_argument('--compare', metavar='BASELINE',
+                        help='results file to compare against; exits 1 on a regression')
+    stages.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed slowdown against the baseline (default: 0.2)')
+
+    parity = subparsers.add_parser('tokenizer-parity',
+                                   help='regex tokenizer vs word_tokenize on War and Peace')
+    parity.add_argument('--source', help='text file to compare on instead of War and Peace')
+    parity.add_argument('--offline', action='store_true',
+                        help='use only the cached download of War and Peace')
+    parity.add_argument('--max-divergence', type=float, default=0.001,
+                        help='allowed share of divergent tokens (default: 0.001)')
+
+    parallel = subparsers.add_parser('parallel',
+                                     help='build_vocabulary_parallel wall time by worker count')
+    parallel.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8],
+                          help='worker counts to time (default: 1 2 4 8)')
+    parallel.add_argument('--language', choices=['english', 'tamil'], default='english',
+                          help='corpus language (default: english)')
+    parallel.add_argument('--size', type=float, default=WAR_AND_PEACE_MB,
+                          help=f'synthetic corpus size in MB (default: {WAR_AND_PEACE_MB:g}, '
+                               'War and Peace)')
+    parallel.add_argument('--source', help='text file to use instead of a synthetic corpus')
+    parallel.add_argument('--repeat', type=int, default=3, help='runs per worker count (best is kept)')
+    parallel.add_argument('--seed', type=int, default=0, help='corpus generator seed')
+
+    args = parser.parse_args()
+    if args.benchmark == 'tamil-cleaner':
+        bench_tamil_cleaner(args.copies)
+    elif args.benchmark == 'tamil-stemmer':
+        bench_tamil_stemmer(args.copies)
+    elif args.benchmark == 'sketch-accuracy':
+        bench_sketch_accuracy(args.width, args.depth, args.top_k, args.precision)
+    elif args.benchmark == 'import-time':
+        if not bench_import_time(args.budget, args.repeat):
+            sys.exit(1)
+    elif args.benchmark == 'stages':
+        report = bench_stages(args.sizes, args.languages, args.output, not args.no_memory,
+                              not args.no_render, args.seed, not args.no_warm_up)
+        if args.compare and not compare_benchmarks(report, args.compare, args.tolerance):
+            sys.exit(1)
+    elif args.benchmark == 'tokenizer-parity':
+        if not bench_tokenizer_parity(args.source, args.offline, args.max_divergence):
+            sys.exit(1)
+    elif args.benchmark == 'parallel':
+        if not bench_parallel(args.workers, args.language, args.size, args.source, args.repeat,
+                              args.seed):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Disk-backed HTTP download cache
+
+Bodies are streamed straight to disk, revalidated with ETag / Last-Modified
+on later runs, and interrupted transfers are resumed with Range requests
+(or restarted if the server will not resume them).
+Bodies are requested without content coding, so Content-Length and Range
+offsets count the bytes that are written. In offline mode only cached
+bodies are used.
+"""
+
+import hashlib
+import json
+import os
+import time
+
+DOWNLOAD_CACHE_DIR = os.path.join('.cache', 'downloads')
+
+
+class DownloadError(Exception):
+    """Raised when a URL cannot be fetched and no cached copy is available"""
+
+
+class DownloadCache:
+    """
+    Cache of downloaded files keyed by URL.
+    For each URL the cache keeps <key>.body (complete body), <key>.json
+    (validators and encoding) and, while a transfer is in progress,
+    <key>.part plus <key>.part.json.
+    """
+
+    def __init__(self, root=DOWNLOAD_CACHE_DIR, timeout=30, retries=3, backoff=1.0,
+                 offline=False, chunk_size=64 * 1024):
+        self.root = root
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.offline = offline
+        self.chunk_size = chunk_size
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.root, key)
+        return base + '.body', base + '.json', base + '.part', base + '.part.json'
+
+    @staticmethod
+    def _read_json(path):
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    @staticmethod
+    def _write_json(path, data):
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(path + '.tmp', path)
+
+    def cached_path(self, url):
+        """Path of the complete cached body, or None"""
+        body_path, meta_path, _, _ = self._paths(url)
+        if os.path.exists(body_path) and os.path.exists(meta_path):
+            return body_path
+        return None
+
+    def metadata(self, url):
+        """Validators and encoding recorded for a cached URL"""
+        return self._read_json(self._paths(url)[1])
+
+    def fetch(self, url):
+        """
+        Return the path of an up-to-date local copy of `url`.
+        Retries with exponential backoff; a partial body survives failed
+        attempts and the next attempt resumes it.
+        """
+        cached = self.cached_path(url)
+        if self.offline:
+            if cached is None:
+                raise DownloadError(f"{url} is not cached and offline mode is enabled")
+            print(f"Offline mode: using cached copy of {url}")
+            return cached
+
+        # Imported here so offline runs never load the HTTP stack
+        import requests
+
+        os.makedirs(self.root, exist_ok=True)
+        last_error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                delay = self.backoff * 2 ** (attempt - 1)
+                print(f"Retrying download in {delay:.1f}s (attempt {attempt + 1})...")
+                time.sleep(delay)
+            try:
+                return self._fetch_once(url)
+            except (requests.RequestException, DownloadError) as e:
+                last_error = e
+                print(f"Download attempt failed: {e}")
+
+        if cached is not None:
+            print(f"Using stale cached copy of {url}")
+            return cached
+        raise DownloadError(f"Failed to download {url}: {last_error}")
+
+    def _fetch_once(self, url):
+        import requests
+
+        body_path, meta_path, part_path, part_meta_path = self._paths(url)
+        meta = self._read_json(meta_path) if os.path.exists(body_path) else None
+        part_meta = self._read_json(part_meta_path) if os.path.exists(part_path) else None
+
+        headers = {'Accept-Encoding': 'identity'}
+        offset = 0
+        if part_meta is not None:
+            # Resume the partial transfer if the server still has the same body
+            offset = os.path.getsize(part_path)
+            validator = part_meta.get('etag') or part_meta.get('last_modified')
+            if offset and validator and part_meta.get('resumable', True):
+                headers['Range'] = f'bytes={offset}-'
+                headers['If-Range'] = validator
+            else:
+                offset = 0
+        elif meta is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        with requests.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+            if offset and response.status_code not in (200, 206):
+                # The partial body cannot be resumed (a 416 means it may
+                # already be complete), so discard it and start over
+                print(f"Cannot resume download (HTTP status {response.status_code}), "
+                      f"restarting from byte 0")
+                os.remove(part_path)
+                os.remove(part_meta_path)
+                return self._fetch_once(url)
+            if response.status_code == 304 and meta is not None:
+                print(f"Cached copy of {url} is up to date")
+                return body_path
+            if response.status_code == 206 and offset:
+                print(f"Resuming download at byte {offset}")
+                mode = 'ab'
+            elif response.status_code == 200:
+                offset = 0
+                mode = 'wb'
+            else:
+                raise DownloadError(f"HTTP status {response.status_code}")
+
+            # A server may compress the body anyway. iter_content decodes it,
+            # so Content-Length no longer matches the bytes written and a
+            # partial body cannot be resumed by byte offset.
+            encoded = response.headers.get('Content-Encoding', 'identity').lower() != 'identity'
+            if mode == 'wb':
+                part_meta = {
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified'),
+                    'encoding': response.encoding or 'utf-8',
+                    'resumable': not encoded,
+                }
+                self._write_json(part_meta_path, part_meta)
+
+            content_length = response.headers.get('Content-Length')
+            with open(part_path, mode) as f:
+                for block in response.iter_content(chunk_size=self.chunk_size):
+                    f.write(block)
+            # Bytes received on the wire, compressed or not
+            received = response.raw.tell() if encoded else os.path.getsize(part_path) - offset
+
+        if content_length is not None and received != int(content_length):
+            raise DownloadError(f"Incomplete body: got {received} of {content_length} bytes")
+        size = os.path.getsize(part_path)
+
+        os.replace(part_path, body_path)
+        self._write_json(meta_path, dict(part_meta, url=url, length=size))
+        os.remove(part_meta_path)
+        print(f"Downloaded {size} bytes from {url}")
+        return body_path
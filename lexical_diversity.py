@@ -0,0 +1,161 @@
+"""
+Length-independent lexical diversity measures over an integer token stream
+
+A global type-token ratio falls as a text gets longer, so corpora of
+different lengths cannot be compared by TTR alone. This module computes,
+in time linear in the number of tokens:
+
+vocabulary_growth    V(n), the number of distinct words among the first n
+                     tokens, for every n
+moving_average_ttr   MATTR: the mean TTR of every window of `window`
+                     consecutive tokens, with the window's word counts
+                     updated incrementally as it slides
+fit_heaps_law        V(n) = K * n**beta fitted on the log-log growth curve
+"""
+
+import numpy as np
+
+DEFAULT_WINDOW = 500
+
+# Growth-curve points used for fitting and plotting (log-spaced)
+CURVE_POINTS = 200
+
+# Heaps' law is fitted from max(HEAPS_MIN_TOKENS, HEAPS_MIN_FRACTION * n)
+# tokens on: the first tokens are too few for a meaningful fit, and front
+# matter such as a table of contents ("chapter i, chapter ii, ...") bends
+# the start of the curve
+HEAPS_MIN_TOKENS = 100
+HEAPS_MIN_FRACTION = 0.01
+
+
+def vocabulary_growth(token_ids, vocab_size=None):
+    """
+    Vocabulary size after each token: growth[n - 1] = distinct words among
+    the first n tokens. np.minimum.at finds each word's first position in
+    one pass, and a cumsum over the first-occurrence flags gives the curve.
+    """
+    token_ids = np.asarray(token_ids, dtype=np.int64)
+    n = len(token_ids)
+    if vocab_size is None:
+        vocab_size = int(token_ids.max()) + 1 if n else 0
+    first = np.full(vocab_size, n, dtype=np.int64)
+    np.minimum.at(first, token_ids, np.arange(n, dtype=np.int64))
+
+    is_new = np.zeros(n, dtype=np.int64)
+    is_new[first[first < n]] = 1
+    return np.cumsum(is_new)
+
+
+def window_type_counts(token_ids, window=DEFAULT_WINDOW, vocab_size=None):
+    """
+    Number of distinct words in each window of `window` consecutive tokens
+    (len(token_ids) - window + 1 windows). The window keeps a count per
+    word and a running number of distinct words: each step adds the
+    incoming token and removes the outgoing one, so the whole pass is O(n).
+    """
+    ids = np.asarray(token_ids).tolist()
+    n = len(ids)
+    if n < window:
+        return np.zeros(0, dtype=np.int64)
+    if vocab_size is None:
+        vocab_size = max(ids) + 1
+
+    counts = [0] * vocab_size
+    distinct = 0
+    for token in ids[:window]:
+        if counts[token] == 0:
+            distinct += 1
+        counts[token] += 1
+
+    types = [distinct]
+    for outgoing, incoming in zip(ids, ids[window:]):
+        counts[outgoing] -= 1
+        if counts[outgoing] == 0:
+            distinct -= 1
+        if counts[incoming] == 0:
+            distinct += 1
+        counts[incoming] += 1
+        types.append(distinct)
+    return np.array(types, dtype=np.int64)
+
+
+def moving_average_ttr(token_ids, window=DEFAULT_WINDOW, vocab_size=None):
+    """
+    Moving-average type-token ratio (MATTR). A text shorter than the
+    window falls back to its plain TTR.
+    """
+    n = len(token_ids)
+    if n == 0:
+        return 0.0
+    if n < window:
+        return len(np.unique(np.asarray(token_ids))) / n
+    return float(window_type_counts(token_ids, window, vocab_size).mean()) / window
+
+
+def curve_points(n, points=CURVE_POINTS):
+    """Up to `points` log-spaced token counts between 1 and n"""
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    return np.unique(np.geomspace(1, n, num=min(points, n)).astype(np.int64))
+
+
+def fit_heaps_law(growth, min_tokens=HEAPS_MIN_TOKENS, points=CURVE_POINTS):
+    """
+    Fit Heaps' law V(n) = K * n**beta by least squares on log V against
+    log n at log-spaced points of the growth curve (see HEAPS_MIN_TOKENS
+    for where the fit starts). Returns (K, beta, r2), or None if the text
+    is too short.
+    """
+    sample = curve_points(len(growth), points)
+    sample = sample[sample >= max(min_tokens, HEAPS_MIN_FRACTION * len(growth))]
+    if len(sample) < 2:
+        return None
+    x = np.log(sample)
+    y = np.log(growth[sample - 1])
+    beta, log_k = np.polyfit(x, y, 1)
+    residuals = y - (beta * x + log_k)
+    total = np.sum((y - y.mean()) ** 2)
+    r2 = 1 - np.sum(residuals ** 2) / total if total > 1e-12 else 1.0
+    return float(np.exp(log_k)), float(beta), float(r2)
+
+
+def diversity_profile(token_ids, vocab_size=None, window=DEFAULT_WINDOW, points=CURVE_POINTS):
+    """
+    All measures for one token stream: token_count, ttr, mattr, window,
+    heaps ((K, beta, r2) or None), the growth curve at log-spaced points
+    (curve_tokens, curve_types), the window TTR at evenly spaced window
+    starts (window_starts, window_ttr) and the full `growth` array (for
+    the TTR of any prefix, see ttr_at). Everything except `growth` is a
+    plain Python value.
+    """
+    token_ids = np.asarray(token_ids)
+    n = len(token_ids)
+    growth = vocabulary_growth(token_ids, vocab_size)
+    sample = curve_points(n, points)
+
+    types = window_type_counts(token_ids, window, vocab_size)
+    if len(types):
+        mattr = float(types.mean()) / window
+        starts = np.unique(np.linspace(0, len(types) - 1, num=min(points, len(types))).astype(np.int64))
+    else:
+        mattr = int(growth[-1]) / n if n else 0.0
+        starts = np.zeros(0, dtype=np.int64)
+
+    return {
+        'token_count': n,
+        'ttr': int(growth[-1]) / n if n else 0.0,
+        'mattr': mattr,
+        'window': window,
+        'heaps': fit_heaps_law(growth, points=points),
+        'curve_tokens': sample.tolist(),
+        'curve_types': growth[sample - 1].tolist() if n else [],
+        'window_starts': starts.tolist(),
+        'window_ttr': (types[starts] / window).tolist(),
+        'growth': growth,
+    }
+
+
+def ttr_at(profile, n):
+    """TTR over the first n tokens of a profiled stream"""
+    n = min(n, profile['token_count'])
+    return int(profile['growth'][n - 1]) / n if n else 0.0
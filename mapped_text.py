@@ -0,0 +1,113 @@
+"""
+Memory-mapped input for large local corpora
+
+Reading a file into a string, cutting off the Project Gutenberg header
+and footer and lowercasing the rest keeps several full copies of a corpus
+in memory. MappedText maps the file read-only instead and finds the
+START and END markers on the mapped bytes, so the header and footer are
+never decoded. The body is then decoded either once as a whole
+(read_body) or in bounded, paragraph-aligned chunks (iter_chunks) for the
+streaming vocabulary builders; the file itself stays in the OS page cache.
+Chunk byte ranges (iter_ranges) let worker processes map the same file
+and decode only their own share.
+"""
+
+import codecs
+import hashlib
+import mmap
+import os
+import re
+
+GUTENBERG_START = b"*** START OF THE PROJECT GUTENBERG EBOOK"
+GUTENBERG_END = b"*** END OF THE PROJECT GUTENBERG EBOOK"
+
+# Target size of each decoded chunk
+STREAM_CHUNK_BYTES = 64 * 1024
+
+# Chunks end after a blank line, with \n or \r\n line endings
+_BLANK_LINE = re.compile(rb'\n[ \t\r\f\v]*\n')
+
+
+def gutenberg_body(data):
+    """
+    (start, end) byte offsets of the text between the Gutenberg START line
+    and the END marker in `data` (bytes or a memory map), by the same
+    rules as VocabularyAnalyzer.clean_gutenberg_text
+    """
+    start = data.find(GUTENBERG_START)
+    start = data.find(b'\n', start) + 1 if start != -1 else 0
+    end = data.find(GUTENBERG_END)
+    if end == -1:
+        end = len(data)
+    return start, max(start, end)
+
+
+class MappedText:
+    """
+    Read-only memory map of a text file and the byte range of its body
+    (the Gutenberg body with clean=True, else the whole file).
+    The encoding must be ASCII-compatible (UTF-8, Latin-1, ...) so that
+    the markers and line breaks can be found on the raw bytes.
+    Use as a context manager or call close().
+    """
+
+    def __init__(self, path, encoding='utf-8', clean=True):
+        if codecs.decode(b'\n*', encoding) != '\n*':
+            raise ValueError(f"Cannot memory-map {path}: {encoding} is not ASCII-compatible")
+        self.path = path
+        self.encoding = encoding
+        with open(path, 'rb') as f:
+            # An empty file cannot be mapped
+            if os.fstat(f.fileno()).st_size:
+                self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self.data = b''
+        self.start, self.end = gutenberg_body(self.data) if clean else (0, len(self.data))
+
+    def __len__(self):
+        """Size of the body in bytes"""
+        return self.end - self.start
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+    def decode(self, start, end):
+        """Decode bytes start:end of the file without copying them first"""
+        with memoryview(self.data)[start:end] as view:
+            return str(view, self.encoding, 'replace')
+
+    def read_body(self):
+        """The whole body as one string"""
+        return self.decode(self.start, self.end)
+
+    def iter_ranges(self, chunk_bytes=STREAM_CHUNK_BYTES):
+        """
+        Byte ranges of paragraph-aligned chunks of roughly chunk_bytes that
+        cover the body. Chunks end after a blank line, so no paragraph (and
+        no multi-byte character) is ever split.
+        """
+        pos = self.start
+        while pos < self.end:
+            match = _BLANK_LINE.search(self.data, min(pos + chunk_bytes, self.end), self.end)
+            end = match.end() if match else self.end
+            yield pos, end
+            pos = end
+
+    def iter_chunks(self, chunk_bytes=STREAM_CHUNK_BYTES):
+        """Decoded paragraph-aligned chunks of the body (see iter_ranges)"""
+        for start, end in self.iter_ranges(chunk_bytes):
+            yield self.decode(start, end)
+
+    def body_digest(self):
+        """stage_cache.digest_text of the body, computed one chunk at a time"""
+        digest = hashlib.sha256()
+        for chunk in self.iter_chunks():
+            digest.update(chunk.encode('utf-8'))
+        return digest.hexdigest()
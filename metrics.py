@@ -0,0 +1,204 @@
+"""
+Structured metrics for pipeline stages
+
+StageMetrics times each stage (wall and CPU time), samples the process's
+resident memory while it runs (optionally also the tracemalloc peak),
+derives throughput such as tokens/s and translation calls/s, and records
+cache hit rates. Every record is appended to a JSON lines file as soon as
+it is complete, so an interrupted run keeps the stages it finished. One
+named stage can be run under cProfile.
+
+VocabularyAnalyzer and TextTranslator methods are wrapped with
+@instrumented; they cost nothing while the object's `metrics` is None.
+"""
+
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+# Seconds between resident memory samples while a stage runs
+RSS_SAMPLE_INTERVAL = 0.05
+
+# Record fields that get a matching <field>_per_second throughput field
+RATE_FIELDS = ('tokens', 'calls', 'chunks')
+
+# Functions listed in a profiled stage's record (by cumulative time)
+PROFILE_TOP = 10
+
+
+def current_rss():
+    """Resident set size of this process in bytes (None where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE')
+
+
+class RssSampler:
+    """Background thread recording the peak resident memory between start() and stop()"""
+
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.start_rss = self.peak = current_rss()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            rss = current_rss()
+            if rss is not None:
+                self.peak = max(self.peak, rss)
+
+    def start(self):
+        if self.start_rss is not None:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop sampling and return the resident memory now"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        rss = current_rss()
+        if rss is not None:
+            self.peak = max(self.peak, rss)
+        return rss
+
+
+class StageMetrics:
+    """
+    Collects one record per stage and per cache report.
+    Records are kept in `records` and, if `path` is set, appended to it as
+    JSON lines. With trace_memory=True each outermost stage also reports
+    its tracemalloc peak (this slows Python code down noticeably). The
+    stage named `profile_stage` runs under cProfile; its stats are dumped
+    to `profile_path` (default <stage>.prof) and its slowest functions are
+    listed in the record.
+    """
+
+    def __init__(self, path=None, trace_memory=False, profile_stage=None, profile_path=None,
+                 rss_interval=RSS_SAMPLE_INTERVAL):
+        self.path = path
+        self.trace_memory = trace_memory
+        self.profile_stage = profile_stage
+        self.profile_path = profile_path
+        self.rss_interval = rss_interval
+        self.run_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+        self.records = []
+        self._lock = threading.Lock()
+
+    def emit(self, record):
+        """Timestamp a record, keep it and append it to the metrics file"""
+        record = {'run': self.run_id, 'time': round(time.time(), 3), **record}
+        with self._lock:
+            self.records.append(record)
+            if self.path:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        return record
+
+    @contextlib.contextmanager
+    def stage(self, name, **fields):
+        """
+        Measure the enclosed block as stage `name`. Yields the record, so
+        the block can add counts (e.g. record['tokens'] = n) before it is
+        emitted. A stage that raises is emitted with its error.
+        """
+        record = {'event': 'stage', 'stage': name, **fields}
+        tracing = self.trace_memory and not tracemalloc.is_tracing()
+        profiler = None
+        if name == self.profile_stage:
+            import cProfile
+            profiler = cProfile.Profile()
+
+        if tracing:
+            tracemalloc.start()
+        # cProfile sees every thread, so a profiled stage is not sampled
+        # (its peak is the larger of the start and end values)
+        sampler = RssSampler(self.rss_interval)
+        if profiler is None:
+            sampler.start()
+        wall, cpu = time.perf_counter(), time.process_time()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield record
+        except BaseException as e:
+            record['error'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            rss = sampler.stop()
+
+            record['seconds'] = round(wall, 6)
+            record['cpu_seconds'] = round(cpu, 6)
+            record['rss_start'] = sampler.start_rss
+            record['rss_end'] = rss
+            record['rss_peak'] = sampler.peak
+            if tracing:
+                record['traced_peak'] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            for field in RATE_FIELDS:
+                if record.get(field) is not None and wall > 0:
+                    record[f'{field}_per_second'] = round(record[field] / wall, 3)
+            if profiler is not None:
+                record.update(self._profile_summary(name, profiler))
+            self.emit(record)
+
+    def _profile_summary(self, name, profiler):
+        """Dump a stage's cProfile stats and list its slowest functions"""
+        import pstats
+
+        path = self.profile_path or f'{name}.prof'
+        profiler.dump_stats(path)
+        stats = pstats.Stats(profiler).stats
+        slowest = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:PROFILE_TOP]
+        return {
+            'profile': path,
+            'profile_top': [{'function': f'{os.path.basename(filename)}:{line}({function})',
+                             'calls': calls, 'seconds': round(cumulative, 6)}
+                            for (filename, line, function), (_, calls, _, cumulative, _)
+                            in slowest],
+        }
+
+    def cache(self, name, hits, misses, **fields):
+        """Record a cache's hit and miss counts"""
+        lookups = hits + misses
+        return self.emit({'event': 'cache', 'cache': name, 'hits': hits, 'misses': misses,
+                          'hit_rate': round(hits / lookups, 6) if lookups else None, **fields})
+
+
+def measured(metrics, name, **fields):
+    """metrics.stage(name), or a no-op context yielding a throwaway record if metrics is None"""
+    if metrics is None:
+        return contextlib.nullcontext({})
+    return metrics.stage(name, **fields)
+
+
+def instrumented(method):
+    """
+    Record a method call as a stage named after the method when the
+    object's `metrics` is set. The object's metrics_fields() supplies
+    fields (language, counts, cache statistics) once the call returns.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.metrics is None:
+            return method(self, *args, **kwargs)
+        with self.metrics.stage(method.__name__) as record:
+            result = method(self, *args, **kwargs)
+            record.update(self.metrics_fields())
+        return result
+    return wrapper
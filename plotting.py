@@ -0,0 +1,287 @@
+"""
+Comparison plots for the English and Tamil vocabulary analyses
+
+Each figure is drawn from a small, picklable data dict extracted from the
+analyzers (or saved ResultsViews). A hash of that data is written into
+the PNG's metadata, so a figure whose data has not changed is not
+rendered again. Figures that do need rendering are drawn in parallel
+worker processes.
+"""
+
+import functools
+import hashlib
+import json
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+
+from lexical_diversity import HEAPS_MIN_FRACTION, HEAPS_MIN_TOKENS
+
+# Bump when the drawing code changes, so existing PNGs are re-rendered
+PLOT_VERSION = 1
+
+# PNG text chunk holding the hash of the data a figure was drawn from
+HASH_KEY = 'VocabularyDataHash'
+
+PREFERRED_TAMIL_FONTS = ('Noto Sans Tamil', 'Lohit Tamil', 'Samyak Tamil')
+
+COLORS = {'english': '#3498db', 'tamil': '#e74c3c'}
+
+
+@functools.lru_cache(maxsize=None)
+def tamil_font_path():
+    """
+    Path of the Tamil font to use, or None if none is installed.
+    Prefers PREFERRED_TAMIL_FONTS in order, then any other Tamil font.
+    The font list is scanned once per process.
+    """
+    from matplotlib import font_manager
+
+    tamil_fonts = {}
+    for font in font_manager.fontManager.ttflist:
+        if 'Tamil' in font.name and 'Supplement' not in font.name:
+            tamil_fonts.setdefault(font.name, font.fname)
+
+    for name in PREFERRED_TAMIL_FONTS + tuple(sorted(tamil_fonts)):
+        if name in tamil_fonts:
+            print(f"Using Tamil font: {name}")
+            return tamil_fonts[name]
+    print("Warning: No Tamil font found")
+    return None
+
+
+def tamil_font():
+    """FontProperties for Tamil labels (the default font if none is installed)"""
+    from matplotlib import font_manager
+    path = tamil_font_path()
+    return font_manager.FontProperties(fname=path) if path else font_manager.FontProperties()
+
+
+def comparison_data(english, tamil):
+    """Data behind vocabulary_comparison.png"""
+    return {
+        'vocab_sizes': [english.vocab_size, tamil.vocab_size],
+        'top_english': list(english.get_top_words(15).items()),
+        'top_tamil': list(tamil.get_top_words(15).items()),
+        'ttr': [english.calculate_lexical_diversity(), tamil.calculate_lexical_diversity()],
+    }
+
+
+def distribution_data(english, tamil):
+    """Data behind frequency_distribution.png"""
+    return {
+        'english': [int(f) for f in english.rank_frequency(100)],
+        'tamil': [int(f) for f in tamil.rank_frequency(100)],
+    }
+
+
+def draw_comparison(plt, data):
+    """Vocabulary size, top 15 words per language and TTR on a 2x2 grid"""
+    fig, axes = plt.subplots(2, 2, figsize=(16, 12))
+    languages = ['English', 'Tamil']
+    colors = [COLORS['english'], COLORS['tamil']]
+
+    # 1. Vocabulary Size Comparison
+    ax1 = axes[0, 0]
+    vocab_sizes = data['vocab_sizes']
+    ax1.bar(languages, vocab_sizes, color=colors, alpha=0.7, edgecolor='black')
+    ax1.set_ylabel('Vocabulary Size', fontsize=12, fontweight='bold')
+    ax1.set_title('Vocabulary Size Comparison', fontsize=14, fontweight='bold')
+    ax1.grid(axis='y', alpha=0.3)
+    for i, v in enumerate(vocab_sizes):
+        ax1.text(i, v + 100, str(v), ha='center', va='bottom', fontweight='bold')
+
+    # 2. Top 15 Words - English, 3. Top 15 Words - Tamil
+    for ax, key, language in ((axes[0, 1], 'top_english', 'english'),
+                              (axes[1, 0], 'top_tamil', 'tamil')):
+        words = [word for word, _ in data[key]]
+        freqs = [freq for _, freq in data[key]]
+        ax.barh(words, freqs, color=COLORS[language], alpha=0.7, edgecolor='black')
+        ax.set_xlabel('Frequency', fontsize=12, fontweight='bold')
+        ax.set_title(f'Top 15 Words in {language.capitalize()}', fontsize=14, fontweight='bold')
+        ax.invert_yaxis()
+        ax.grid(axis='x', alpha=0.3)
+
+    # Apply Tamil font to the Tamil y-axis labels
+    font = tamil_font()
+    for label in axes[1, 0].get_yticklabels():
+        label.set_fontproperties(font)
+        label.set_fontsize(11)
+
+    # 4. Lexical Diversity Comparison
+    ax4 = axes[1, 1]
+    ttr_values = data['ttr']
+    ax4.bar(languages, ttr_values, color=colors, alpha=0.7, edgecolor='black')
+    ax4.set_ylabel('Type-Token Ratio', fontsize=12, fontweight='bold')
+    ax4.set_title('Lexical Diversity (TTR)', fontsize=14, fontweight='bold')
+    ax4.set_ylim(0, max(ttr_values) * 1.2 or 1)
+    ax4.grid(axis='y', alpha=0.3)
+    for i, v in enumerate(ttr_values):
+        ax4.text(i, v + 0.001, f'{v:.4f}', ha='center', va='bottom', fontweight='bold')
+
+    fig.tight_layout()
+    return fig
+
+
+def draw_distribution(plt, data):
+    """Log-log rank/frequency curves of the top 100 words (Zipf's law)"""
+    fig, axes = plt.subplots(1, 2, figsize=(14, 6))
+    for ax, language, style in ((axes[0], 'english', 'b-'), (axes[1], 'tamil', 'r-')):
+        freqs = data[language]
+        ax.plot(range(1, len(freqs) + 1), freqs, style, linewidth=2)
+        ax.set_xlabel('Rank', fontsize=12, fontweight='bold')
+        ax.set_ylabel('Frequency', fontsize=12, fontweight='bold')
+        ax.set_title(f'{language.capitalize()} Word Frequency Distribution (Top 100)',
+                     fontsize=14, fontweight='bold')
+        ax.grid(True, alpha=0.3)
+        ax.set_yscale('log')
+        ax.set_xscale('log')
+    fig.tight_layout()
+    return fig
+
+
+def diversity_data(english, tamil):
+    """Data behind lexical_diversity.png (None for a language without a token stream)"""
+    data = {}
+    for language, analyzer in (('english', english), ('tamil', tamil)):
+        profile = analyzer.lexical_diversity_profile()
+        if profile is not None:
+            profile = {key: value for key, value in profile.items() if key != 'growth'}
+        data[language] = profile
+    return data
+
+
+def draw_diversity(plt, data):
+    """Vocabulary growth with the Heaps' law fit, and TTR over a sliding window"""
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
+    for language, profile in data.items():
+        if profile is None:
+            continue
+        color = COLORS[language]
+        name = language.capitalize()
+        ax1.plot(profile['curve_tokens'], profile['curve_types'], color=color, linewidth=2,
+                 label=name)
+        if profile['heaps']:
+            # Draw the fit only over the part of the curve it was fitted on
+            k, beta, _ = profile['heaps']
+            start = max(HEAPS_MIN_TOKENS, HEAPS_MIN_FRACTION * profile['token_count'])
+            n = [x for x in profile['curve_tokens'] if x >= start]
+            ax1.plot(n, [k * x ** beta for x in n], color=color, linestyle='--', linewidth=1,
+                     label=f'{name} fit: {k:.3g}·n^{beta:.3f}')
+        ax2.plot(profile['window_starts'], profile['window_ttr'], color=color, linewidth=1.5,
+                 label=f"{name} (MATTR {profile['mattr']:.4f})")
+
+    ax1.set_xlabel('Tokens', fontsize=12, fontweight='bold')
+    ax1.set_ylabel('Vocabulary Size', fontsize=12, fontweight='bold')
+    ax1.set_title("Vocabulary Growth (Heaps' Law)", fontsize=14, fontweight='bold')
+    ax1.set_xscale('log')
+    ax1.set_yscale('log')
+    ax1.grid(True, alpha=0.3)
+    ax1.legend()
+
+    window = next((p['window'] for p in data.values() if p), 0)
+    ax2.set_xlabel('Window Start (token)', fontsize=12, fontweight='bold')
+    ax2.set_ylabel('Type-Token Ratio', fontsize=12, fontweight='bold')
+    ax2.set_title(f'Moving TTR ({window}-token window)', fontsize=14, fontweight='bold')
+    ax2.set_ylim(0, 1)
+    ax2.grid(True, alpha=0.3)
+    ax2.legend()
+    fig.tight_layout()
+    return fig
+
+
+# Output file -> (data extractor, drawing function)
+FIGURES = {
+    'vocabulary_comparison.png': (comparison_data, draw_comparison),
+    'frequency_distribution.png': (distribution_data, draw_distribution),
+    'lexical_diversity.png': (diversity_data, draw_diversity),
+}
+
+
+def data_hash(name, data):
+    """Hash of a figure's input data and the drawing code version"""
+    payload = json.dumps({'figure': name, 'version': PLOT_VERSION, 'data': data},
+                         sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def read_png_text(path):
+    """tEXt chunks of a PNG file as a dict ({} if unreadable)"""
+    text = {}
+    try:
+        with open(path, 'rb') as f:
+            if f.read(8) != b'\x89PNG\r\n\x1a\n':
+                return text
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    break
+                length, chunk_type = struct.unpack('>I4s', header)
+                if chunk_type == b'tEXt':
+                    key, _, value = f.read(length).partition(b'\0')
+                    text[key.decode('latin-1')] = value.decode('latin-1')
+                    f.seek(4, os.SEEK_CUR)
+                elif chunk_type == b'IEND':
+                    break
+                else:
+                    f.seek(length + 4, os.SEEK_CUR)
+    except OSError:
+        pass
+    return text
+
+
+def is_up_to_date(path, digest):
+    """True if the PNG at path was rendered from data with this hash"""
+    return os.path.exists(path) and read_png_text(path).get(HASH_KEY) == digest
+
+
+def render_figure(name, data, digest, output_dir='.'):
+    """Draw one figure and save it with its data hash (runs in a worker process)"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    sns.set_style("whitegrid")
+    matplotlib.rcParams['axes.unicode_minus'] = False
+
+    _, draw = FIGURES[name]
+    fig = draw(plt, data)
+    path = os.path.join(output_dir, name)
+    fig.savefig(path, dpi=300, bbox_inches='tight', metadata={HASH_KEY: digest})
+    plt.close(fig)
+    return path
+
+
+def render_figures(english, tamil, output_dir='.', figures=None, workers=None, force=False):
+    """
+    Render the comparison figures for two analyzers (or ResultsViews).
+    Figures whose PNG already carries the hash of the current data are
+    skipped unless force=True; the others are rendered in parallel on up
+    to `workers` processes. Returns the paths that were rendered.
+    """
+    todo = []
+    for name in figures or FIGURES:
+        extract, _ = FIGURES[name]
+        data = extract(english, tamil)
+        digest = data_hash(name, data)
+        if not force and is_up_to_date(os.path.join(output_dir, name), digest):
+            print(f"[cache] {name}: data unchanged, skipping")
+            continue
+        todo.append((name, data, digest))
+
+    if not todo:
+        return []
+
+    workers = min(len(todo), workers or os.cpu_count() or 1)
+    if workers == 1:
+        paths = [render_figure(name, data, digest, output_dir) for name, data, digest in todo]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(render_figure, name, data, digest, output_dir)
+                       for name, data, digest in todo]
+            paths = [future.result() for future in futures]
+
+    for path in paths:
+        print(f"Saved {path}")
+    return paths
@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+Local HTTP/JSON query service over saved analysis results
+
+Usage:
+    python query_service.py [RESULTS_DIR ...] [--host HOST] [--port PORT]
+                            [--poll SECONDS] [--quiet]
+
+Each results directory (default: english_results and tamil_results) is
+loaded once into an in-memory index. The index holds the word table, a
+word -> ID dict, the counts in rank order, the lexical diversity profile
+and the TF-IDF ranking. Every connection is handled on its own thread,
+answering from that index. A watcher thread polls the directories and
+rebuilds the index of any directory that changed. The new index replaces
+the old one in a single assignment, so each request sees one consistent
+version.
+
+Endpoints (GET, JSON responses). `dataset` is a directory name or a
+language; it may be omitted when only one dataset is loaded.
+
+    /datasets                               summary of every dataset
+    /lookup?dataset=D&word=W[&word=W2...]   count, rank and relative frequency
+    /top?dataset=D[&k=20][&by=count|tfidf]  the k most frequent (or highest TF-IDF) words
+    /rank?dataset=D&rank=N                  the word at rank N
+    /ttr?dataset=D[&tokens=N]               TTR, MATTR, Heaps' law fit and the TTR
+                                            over the first N tokens
+    /compare[?word=W...][&k=10]             all datasets side by side, with the TTR
+                                            at the length of the shortest one
+
+Words are matched as they are stored: lowercased English lemmas and
+Tamil surface forms (or stems, for stemmed results).
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from lexical_diversity import ttr_at
+from results_store import RankIndex, load_results
+
+DEFAULT_DIRECTORIES = ('english_results', 'tamil_results')
+
+DEFAULT_PORT = 8765
+
+# Seconds between checks of the results directories for changes
+POLL_INTERVAL = 2.0
+
+# Largest k accepted by /top and /compare (also the length of the TF-IDF ranking kept)
+MAX_K = 1000
+
+
+class QueryError(Exception):
+    """A request that cannot be answered; `status` is the HTTP status to send"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def directory_signature(directory):
+    """(name, size, mtime) of each file in a results directory, or None without a manifest"""
+    try:
+        entries = []
+        for entry in os.scandir(directory):
+            if entry.is_file():
+                stat = entry.stat()
+                entries.append((entry.name, stat.st_size, stat.st_mtime_ns))
+    except OSError:
+        return None
+    if not any(name == 'manifest.json' for name, _, _ in entries):
+        return None
+    return tuple(sorted(entries))
+
+
+class ResultsIndex:
+    """
+    Read-only in-memory index of one results directory.
+    Everything a query needs is computed when the index is built, and
+    nothing stays memory-mapped, so the directory can be rewritten while
+    the index is serving requests.
+    """
+
+    def __init__(self, directory):
+        view = load_results(directory)
+        self.name = os.path.basename(os.path.normpath(directory))
+        self.directory = directory
+        self.language = view.language
+        self.normalization = view.normalization
+        self.vocab_size = view.vocab_size
+        self.token_count = view.token_count
+        self.ttr = view.calculate_lexical_diversity()
+        self.loaded_at = time.time()
+
+        self.words = view.id_to_word
+        self.word_to_id = {word: i for i, word in enumerate(self.words)}
+        self.counts = np.array(view.counts)
+        self.rank_index = RankIndex(self.counts, np.array(view.rank_index.order))
+        if self.vocab_size:
+            # Build the word -> rank table now rather than on the first request
+            self.rank_index.rank_of(0)
+
+        self.profile = view.lexical_diversity_profile()
+        tfidf = view.tfidf
+        self.tfidf_top = None
+        if tfidf is not None:
+            ids, scores = tfidf.top(MAX_K)
+            self.tfidf_top = list(zip(ids.tolist(), scores.tolist()))
+
+    def entry(self, word_id):
+        """Word, count and rank of a word ID"""
+        count = int(self.counts[word_id])
+        return {
+            'word': self.words[word_id],
+            'count': count,
+            'rank': self.rank_index.rank_of(word_id),
+            'frequency': count / self.token_count if self.token_count else 0.0,
+        }
+
+    def lookup(self, word):
+        """entry() of a word, with count 0 and rank None if it is not in the vocabulary"""
+        if self.language == 'english':
+            word = word.lower()
+        word_id = self.word_to_id.get(word)
+        if word_id is None:
+            return {'word': word, 'count': 0, 'rank': None, 'frequency': 0.0}
+        return self.entry(word_id)
+
+    def top(self, k, by='count'):
+        """The k most frequent words, or the k with the highest TF-IDF scores"""
+        if by == 'count':
+            ids, _ = self.rank_index.top(k)
+            return [self.entry(word_id) for word_id in ids.tolist()]
+        if by == 'tfidf':
+            if self.tfidf_top is None:
+                raise QueryError(f"{self.name} has no chapter TF-IDF scores", 404)
+            return [{'word': self.words[word_id], 'tfidf': score}
+                    for word_id, score in self.tfidf_top[:k]]
+        raise QueryError(f"Unknown ranking '{by}' (expected count or tfidf)")
+
+    def at_rank(self, rank):
+        """entry() of the word at a 1-based frequency rank"""
+        if not 1 <= rank <= self.vocab_size:
+            raise QueryError(f"{self.name} has ranks 1 to {self.vocab_size}", 404)
+        return self.entry(int(self.rank_index.order[rank - 1]))
+
+    def diversity(self, tokens=None):
+        """TTR plus, with a token stream, MATTR, Heaps' law and the TTR over the first `tokens`"""
+        data = {'dataset': self.name, 'language': self.language,
+                'token_count': self.token_count, 'vocab_size': self.vocab_size, 'ttr': self.ttr}
+        if self.profile is None:
+            if tokens is not None:
+                raise QueryError(f"{self.name} was saved without its token stream", 404)
+            return data
+
+        heaps = self.profile['heaps']
+        data['mattr'] = self.profile['mattr']
+        data['window'] = self.profile['window']
+        data['heaps'] = dict(zip(('k', 'beta', 'r2'), heaps)) if heaps else None
+        if tokens is not None:
+            tokens = min(tokens, self.token_count)
+            data['ttr_at'] = {'tokens': tokens, 'ttr': ttr_at(self.profile, tokens)}
+        return data
+
+    def summary(self):
+        """Name, language and headline statistics"""
+        return {
+            'dataset': self.name,
+            'directory': self.directory,
+            'language': self.language,
+            'normalization': self.normalization,
+            'vocab_size': self.vocab_size,
+            'token_count': self.token_count,
+            'ttr': self.ttr,
+            'mattr': self.profile['mattr'] if self.profile else None,
+            'tfidf': self.tfidf_top is not None,
+            'loaded_at': self.loaded_at,
+        }
+
+
+class ResultsStore:
+    """
+    The current ResultsIndex of each results directory.
+    Readers take the index they need under the lock and then use it
+    without locking. A reload builds the new index first and only swaps
+    it in under the lock; if loading fails the old index stays.
+    """
+
+    def __init__(self, directories):
+        self.directories = list(directories)
+        self._indexes = {}
+        self._signatures = {}
+        # Changed signatures waiting to stay stable for one poll
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        for directory in self.directories:
+            self.reload(directory)
+
+    def reload(self, directory, signature=None):
+        """(Re)build the index of one directory and swap it in"""
+        signature = signature or directory_signature(directory)
+        if signature is None:
+            print(f"No results in {directory}, skipping")
+            return False
+        try:
+            index = ResultsIndex(directory)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Could not load {directory}: {e}")
+            return False
+        with self._lock:
+            self._indexes[directory] = index
+            self._signatures[directory] = signature
+        print(f"Loaded {directory}: {index.vocab_size:,} words, {index.token_count:,} tokens")
+        return True
+
+    def check(self):
+        """
+        Reload the directories whose files changed. A change is picked up
+        once the files have stayed the same for one poll, so a directory
+        that is still being written is not loaded half-way.
+        """
+        for directory in self.directories:
+            signature = directory_signature(directory)
+            if signature is None or signature == self._signatures.get(directory):
+                self._pending.pop(directory, None)
+            elif self._pending.get(directory) == signature:
+                del self._pending[directory]
+                self.reload(directory, signature)
+            else:
+                self._pending[directory] = signature
+
+    def watch(self, interval=POLL_INTERVAL):
+        """Start a daemon thread that calls check() every `interval` seconds"""
+        def poll():
+            while not self._stop.wait(interval):
+                self.check()
+
+        self._thread = threading.Thread(target=poll, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def indexes(self):
+        with self._lock:
+            return list(self._indexes.values())
+
+    def get(self, name=None):
+        """The index of a dataset, by directory name or (if unambiguous) language"""
+        indexes = self.indexes()
+        if name is None:
+            if len(indexes) == 1:
+                return indexes[0]
+            raise QueryError("Several datasets are loaded; pass dataset= one of "
+                             + ', '.join(index.name for index in indexes))
+        matches = [index for index in indexes if index.name == name]
+        if not matches:
+            matches = [index for index in indexes if index.language == name]
+        if len(matches) == 1:
+            return matches[0]
+        if not matches:
+            raise QueryError(f"Unknown dataset '{name}'", 404)
+        raise QueryError(f"'{name}' matches several datasets ("
+                         + ', '.join(index.name for index in matches) + "); use its name")
+
+
+def param(params, name, default=None):
+    """Last value of a query parameter"""
+    values = params.get(name)
+    return values[-1] if values else default
+
+
+def int_param(params, name, default=None, minimum=None, maximum=None):
+    """Integer query parameter, checked against its bounds"""
+    value = param(params, name)
+    if value is None:
+        if default is None:
+            raise QueryError(f"Missing parameter '{name}'")
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise QueryError(f"Parameter '{name}' must be an integer") from None
+    if minimum is not None and value < minimum:
+        raise QueryError(f"Parameter '{name}' must be at least {minimum}")
+    if maximum is not None and value > maximum:
+        raise QueryError(f"Parameter '{name}' must be at most {maximum}")
+    return value
+
+
+def query_datasets(store, params):
+    return {'datasets': [index.summary() for index in store.indexes()]}
+
+
+def query_lookup(store, params):
+    index = store.get(param(params, 'dataset'))
+    words = params.get('word')
+    if not words:
+        raise QueryError("Missing parameter 'word'")
+    return {'dataset': index.name, 'words': [index.lookup(word) for word in words]}
+
+
+def query_top(store, params):
+    index = store.get(param(params, 'dataset'))
+    k = int_param(params, 'k', 20, 1, MAX_K)
+    by = param(params, 'by', 'count')
+    return {'dataset': index.name, 'by': by, 'words': index.top(k, by)}
+
+
+def query_rank(store, params):
+    index = store.get(param(params, 'dataset'))
+    return {'dataset': index.name, **index.at_rank(int_param(params, 'rank', minimum=1))}
+
+
+def query_ttr(store, params):
+    index = store.get(param(params, 'dataset'))
+    tokens = param(params, 'tokens')
+    return index.diversity(int_param(params, 'tokens', minimum=1) if tokens else None)
+
+
+def query_compare(store, params):
+    names = param(params, 'datasets')
+    indexes = [store.get(name) for name in names.split(',')] if names else store.indexes()
+    k = int_param(params, 'k', 10, 1, MAX_K)
+    words = params.get('word', [])
+
+    # TTR falls with text length, so it is also compared at the length of
+    # the shortest text (when every dataset has its token stream)
+    common = None
+    if indexes and all(index.profile is not None for index in indexes):
+        common = min(index.token_count for index in indexes)
+    datasets = []
+    for index in indexes:
+        data = index.diversity(common)
+        data['normalization'] = index.normalization
+        data['top'] = index.top(k)
+        if words:
+            data['words'] = [index.lookup(word) for word in words]
+        datasets.append(data)
+    return {'common_tokens': common, 'datasets': datasets}
+
+
+ROUTES = {
+    '/datasets': query_datasets,
+    '/lookup': query_lookup,
+    '/top': query_top,
+    '/rank': query_rank,
+    '/ttr': query_ttr,
+    '/compare': query_compare,
+}
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """Answers GET requests from the server's ResultsStore as JSON"""
+
+    server_version = 'VocabularyQuery/1.0'
+    # Keep-alive connections, so a client pays the connection setup once
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        path = url.path.rstrip('/') or '/'
+        try:
+            if path == '/':
+                status, body = 200, {'endpoints': sorted(ROUTES)}
+            elif path in ROUTES:
+                status, body = 200, ROUTES[path](self.server.store, parse_qs(url.query))
+            else:
+                raise QueryError(f"Unknown endpoint {url.path}", 404)
+        except QueryError as e:
+            status, body = e.status, {'error': str(e)}
+
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class QueryServer(ThreadingHTTPServer):
+    """Threaded HTTP server answering queries from a ResultsStore"""
+
+    daemon_threads = True
+
+    def __init__(self, address, store, quiet=False):
+        super().__init__(address, QueryHandler)
+        self.store = store
+        self.quiet = quiet
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('directories', nargs='*', default=list(DEFAULT_DIRECTORIES),
+                        help='results directories to serve (default: english_results tamil_results)')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help=f'port to listen on (default: {DEFAULT_PORT})')
+    parser.add_argument('--poll', type=float, default=POLL_INTERVAL,
+                        help=f'seconds between checks for changed results (default: {POLL_INTERVAL})')
+    parser.add_argument('--quiet', action='store_true', help='do not log requests')
+    args = parser.parse_args()
+
+    store = ResultsStore(args.directories)
+    if not store.indexes():
+        print("No results to serve (run nlp_vocabulary_analysis.py first)")
+        sys.exit(1)
+    store.watch(args.poll)
+
+    server = QueryServer((args.host, args.port), store, args.quiet)
+    print(f"Serving {', '.join(index.name for index in store.indexes())} "
+          f"on http://{args.host}:{server.server_port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping")
+    finally:
+        server.server_close()
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+"""
+Single-pass regex tokenizer for the English pipeline
+
+preprocess_english keeps only the alphabetic tokens of at least
+min_token_length characters that NLTK's word_tokenize produces. NLTK
+gets there by splitting sentences with Punkt and then running some twenty
+Treebank substitutions over each sentence. Most of that work is spent on
+punctuation tokens that are thrown away anyway.
+
+RegexTokenizer makes one compiled pass over the text instead. It finds
+the runs of characters that Treebank never splits. A purely alphabetic
+run (most of them) is a token as it is. Any other run goes through the
+Treebank rules that can act inside a run:
+
+- opening and closing quotes
+- commas and colons
+- ellipses and double dashes
+- the sentence-final period
+- contractions ("do n't", "john 's", "can not")
+
+Only the surviving alphabetic tokens are returned. Sentence ends are not
+found by Punkt. A period ends a sentence when whitespace, closing
+punctuation or the end of the text follows it, unless the word before it
+is a known abbreviation. For the remaining differences from
+word_tokenize, run `python benchmarks.py tokenizer-parity`.
+"""
+
+import os
+import re
+
+# Characters Treebank always splits off as separate tokens: quotes,
+# brackets, ; @ # $ % & ? ! * and figure/en/em dashes
+_SEPARATOR = '\\s«»“”‘’„`";@#$%&\u2012-\u2015?!*()\\[\\]{}<>'
+_RUN = re.compile(f'[^{_SEPARATOR}]+')
+
+# Characters directly after a period that let Punkt end the sentence there
+_SENTENCE_BREAK_AFTER = set(')";}]*:@\'({[\u2018\u2019\u201c\u201d\xab\xbb?!')
+
+# Quotes and brackets that Punkt moves from the start of the next sentence
+# to the end of this one, and those of them after which Treebank still
+# splits off the final period
+_REALIGNED = re.compile('["\')\\]}\u2018\u2019\u201c\u201d\xab\xbb]+?(?:\\s+|(?=--)|$)')
+_NON_SPACE = re.compile(r'\S*')
+_CLOSING = set(']})>"\'\xbb\u201d\u2019')
+
+# Treebank rules that can apply inside a run (see nltk.tokenize.destructive)
+_DOUBLE_QUOTE = re.compile(r"''")
+_OPENING_QUOTE = re.compile(r"(?<!\w)(')(?!(?:re|ve|ll|m|t|s|d|n)\b)(?=\w)")
+_COMMA_COLON = re.compile(r"([:,])([^\d])")
+_ELLIPSIS = re.compile(r"\.{2,}")
+_FINAL_PERIOD = re.compile(r"([^.])\.('*)\s*$")
+_CLOSING_QUOTE = re.compile(r"([^'])' ")
+_DOUBLE_DASH = re.compile(r"--")
+_CLITIC = re.compile(r"([^' ])('s|'m|'d|') ")
+_CONTRACTION = re.compile(r"([^' ])('ll|'re|'ve|n't) ")
+_MULTIWORD = [re.compile(pattern) for pattern in (
+    r"\b(can)(not)\b", r"\b(d)('ye)\b", r"\b(gim)(me)\b", r"\b(gon)(na)\b",
+    r"\b(got)(ta)\b", r"\b(lem)(me)\b", r"\b(more)('n)\b", r"\b(wan)(na)(?=\s)")]
+
+# Alphabetic words Treebank splits in two (the MacIntyre contractions)
+_MULTIWORD_SPLITS = {
+    'cannot': ('can', 'not'),
+    'gimme': ('gim', 'me'),
+    'gonna': ('gon', 'na'),
+    'gotta': ('got', 'ta'),
+    'lemme': ('lem', 'me'),
+    'wanna': ('wan', 'na'),
+}
+
+# Used when the Punkt model's abbreviation list is not installed
+DEFAULT_ABBREVIATIONS = frozenset({'mr', 'mrs', 'messrs', 'dr', 'st', 'jr', 'sr', 'co', 'vs',
+                                   'etc', 'gen', 'col', 'capt', 'lt', 'prof', 'rev',
+                                   'jan', 'feb', 'aug', 'sept', 'oct', 'nov', 'dec'})
+
+
+def punkt_abbreviations(language='english'):
+    """
+    Abbreviations of NLTK's Punkt model (words after which a period does
+    not end a sentence), read from the punkt_tab data if it is installed,
+    else DEFAULT_ABBREVIATIONS
+    """
+    try:
+        import nltk.data
+        directory = nltk.data.find(f'tokenizers/punkt_tab/{language}')
+    except (ImportError, LookupError):
+        return DEFAULT_ABBREVIATIONS
+    with open(os.path.join(str(directory), 'abbrev_types.txt'), 'r', encoding='utf-8') as f:
+        return frozenset(line.strip() for line in f if line.strip())
+
+
+class RegexTokenizer:
+    """
+    Lowercase text -> the alphabetic tokens of at least min_length
+    characters that word_tokenize would produce (see the module docstring)
+    """
+
+    def __init__(self, min_length=3, abbreviations=None):
+        self.min_length = min_length
+        self.abbreviations = DEFAULT_ABBREVIATIONS if abbreviations is None else abbreviations
+
+    def __call__(self, text):
+        return list(self.iter_tokens(text))
+
+    def iter_tokens(self, text):
+        min_length = self.min_length
+        for match in _RUN.finditer(text):
+            run = match.group()
+            if not run.isalpha():
+                # Shortcuts for the common "word," and "word." runs
+                word, last = run[:-1], run[-1]
+                if word.isalpha() and last in ',:':
+                    run = word
+                elif word.isalpha() and last == '.' and word not in self.abbreviations:
+                    if not self.breaks_after(text, match.end()):
+                        continue
+                    run = word
+                else:
+                    final = self.is_sentence_end(run) and \
+                        self.breaks_after(text, match.end() - (len(run) - len(run.rstrip("'"))))
+                    for token in self.split_run(run, final):
+                        if token.isalpha() and len(token) >= min_length:
+                            yield token
+                    continue
+
+            if len(run) >= min_length:
+                if run in _MULTIWORD_SPLITS:
+                    yield from (word for word in _MULTIWORD_SPLITS[run] if len(word) >= min_length)
+                else:
+                    yield run
+
+    def is_sentence_end(self, run):
+        """True if `run` ends in a period that is not an abbreviation's"""
+        word = run.rstrip("'")
+        if not word.endswith('.') or word.endswith('..'):
+            return False
+        # Punkt also treats the last part of a hyphenated word as a possible abbreviation
+        word = word[:-1]
+        return word not in self.abbreviations and word.split('-')[-1] not in self.abbreviations
+
+    @staticmethod
+    def breaks_after(text, position):
+        """
+        True if a sentence-final period at `position` (the index after it)
+        ends Punkt's sentence in a way Treebank splits it off: the period
+        is followed by the end of the text, by whitespace or by closing
+        punctuation, and any quotes Punkt pulls into the sentence after it
+        are closing ones.
+        """
+        if position == len(text):
+            return True
+        # Punkt breaks after the last of consecutive sentence-ending
+        # characters ("mrs.?", "etc.)."), leaving this period inside
+        if any(c in '.?!' for c in _NON_SPACE.match(text, position).group()):
+            return False
+        start = position
+        if text[position].isspace():
+            while start < len(text) and text[start].isspace():
+                start += 1
+            if start == len(text):
+                return True
+        elif text[position] not in _SENTENCE_BREAK_AFTER:
+            return False
+        realigned = _REALIGNED.match(text, start)
+        return realigned is None or all(c in _CLOSING for c in realigned.group().rstrip())
+
+    def split_run(self, run, final=False):
+        """
+        Apply the Treebank rules that act inside a run of non-separator
+        characters. With final=True the run's last period ends a sentence
+        and is split off.
+        """
+        text = _DOUBLE_QUOTE.sub(" '' ", run)
+        text = _OPENING_QUOTE.sub(r"\1 ", text)
+        text = _COMMA_COLON.sub(r" \1 \2", text + ' ')
+        text = _ELLIPSIS.sub(r" \g<0> ", text)
+        if final:
+            text = _FINAL_PERIOD.sub(r"\1 . \2 ", text)
+        text = _CLOSING_QUOTE.sub(r"\1 ' ", text)
+        text = _DOUBLE_DASH.sub(' -- ', text)
+        text = ' ' + re.sub(r'\s+', ' ', text) + ' '
+        text = _CLITIC.sub(r"\1 \2 ", text)
+        text = _CONTRACTION.sub(r"\1 \2 ", text)
+        for regexp in _MULTIWORD:
+            text = regexp.sub(r" \1 \2 ", text)
+        return text.split()
@@ -0,0 +1,306 @@
+"""
+Memory-mappable on-disk format for vocabulary analysis results
+
+A results directory contains:
+    manifest.json       format name/version plus scalar statistics
+    counts.npy          int64 word counts, indexed by word ID
+    vocab.bin           UTF-8 bytes of all words, concatenated
+    vocab_offsets.npy   int64 offsets into vocab.bin (vocab_size + 1 entries)
+    token_ids.npy       uint32 token stream (optional)
+    rank_ids.npy        word IDs sorted by descending count (optional)
+    doc_offsets.npy     int64 token offset of each chapter (optional; the
+                        chapter names are listed in the manifest)
+
+Every array file can be opened with mmap, so loading is instant and only the
+pages that a query touches are read. Nothing is unpickled.
+"""
+
+import json
+import mmap
+import os
+import pickle
+
+import numpy as np
+
+from lexical_diversity import DEFAULT_WINDOW, diversity_profile
+from tfidf import TfidfIndex
+
+FORMAT_NAME = 'vocab-results'
+FORMAT_VERSION = 1
+
+
+class RankIndex:
+    """
+    Frequency-sorted rank index: word IDs ordered by descending count (ties
+    in word ID order, matching Counter.most_common) plus the parallel
+    sorted counts. Top-k and rank/frequency queries are O(k) slices.
+    """
+
+    def __init__(self, counts, order=None):
+        if order is None:
+            order = np.argsort(-np.asarray(counts), kind='stable')
+        self.order = order
+        self.sorted_counts = np.asarray(counts)[order]
+        self._ranks = None
+
+    def top(self, k):
+        """Word IDs and counts of the k most frequent words"""
+        return self.order[:k], self.sorted_counts[:k]
+
+    def rank_of(self, word_id):
+        """1-based frequency rank of a word ID"""
+        if self._ranks is None:
+            self._ranks = np.empty(len(self.order), dtype=np.int64)
+            self._ranks[self.order] = np.arange(len(self.order))
+        return int(self._ranks[word_id]) + 1
+
+    def rank_frequency(self, k=None):
+        """Counts by rank (the rank/frequency curve), optionally the first k"""
+        return self.sorted_counts[:k]
+
+
+def _write_array(directory, name, array):
+    """Write one .npy file atomically"""
+    path = os.path.join(directory, name)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def save_results(directory, language, id_to_word, counts, token_ids=None, extra=None,
+                 rank_ids=None, doc_offsets=None, doc_names=None):
+    """
+    Write analysis results to `directory` in the memory-mappable format.
+    `id_to_word` and `counts` are parallel (word ID -> word, word ID -> count);
+    `token_ids` is the optional uint32 token stream and `rank_ids` the
+    optional precomputed rank order (see RankIndex). `doc_offsets` and
+    `doc_names` record the chapters of the token stream for TF-IDF.
+    The manifest is written last, so a partially written directory is never
+    mistaken for a complete one.
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    counts = np.asarray(counts, dtype=np.int64)
+    encoded = [word.encode('utf-8') for word in id_to_word]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    if encoded:
+        np.cumsum([len(word) for word in encoded], out=offsets[1:])
+
+    _write_array(directory, 'counts.npy', counts)
+    _write_array(directory, 'vocab_offsets.npy', offsets)
+    with open(os.path.join(directory, 'vocab.bin'), 'wb') as f:
+        f.write(b''.join(encoded))
+
+    files = ['counts.npy', 'vocab.bin', 'vocab_offsets.npy']
+    if token_ids is not None:
+        _write_array(directory, 'token_ids.npy', np.asarray(token_ids, dtype=np.uint32))
+        files.append('token_ids.npy')
+    if rank_ids is not None:
+        _write_array(directory, 'rank_ids.npy', np.asarray(rank_ids, dtype=np.int64))
+        files.append('rank_ids.npy')
+    if doc_offsets is not None:
+        _write_array(directory, 'doc_offsets.npy', np.asarray(doc_offsets, dtype=np.int64))
+        files.append('doc_offsets.npy')
+
+    manifest = {
+        'format': FORMAT_NAME,
+        'version': FORMAT_VERSION,
+        'language': language,
+        'vocab_size': len(id_to_word),
+        'token_count': int(counts.sum()),
+        'files': files,
+    }
+    if doc_offsets is not None:
+        manifest['documents'] = list(doc_names) if doc_names is not None else None
+    if extra:
+        manifest.update(extra)
+
+    manifest_path = os.path.join(directory, 'manifest.json')
+    with open(manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(manifest_path + '.tmp', manifest_path)
+
+
+class ResultsView:
+    """
+    Lazy, read-only view over a saved results directory.
+    Exposes the same attributes and methods the plotting and report code
+    uses on VocabularyAnalyzer (vocab_size, token_count, vocabulary,
+    get_top_words, calculate_lexical_diversity).
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, 'manifest.json'), 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+
+        if self.manifest.get('format') != FORMAT_NAME:
+            raise ValueError(f"{directory} is not a vocabulary results directory")
+        if self.manifest.get('version', 0) > FORMAT_VERSION:
+            raise ValueError(f"{directory} uses results format version "
+                             f"{self.manifest['version']}, newer than supported "
+                             f"version {FORMAT_VERSION}")
+
+        self.language = self.manifest['language']
+        self.vocab_size = self.manifest['vocab_size']
+        self.token_count = self.manifest['token_count']
+        # lemmatized, stemmed or surface (None in results saved before it was recorded)
+        self.normalization = self.manifest.get('normalization')
+        self._counts = None
+        self._offsets = None
+        self._vocab_bytes = None
+        self._token_ids = None
+        self._vocabulary = None
+        self._rank_index = None
+        self._word_to_id = None
+        self._tfidf = None
+        self._profiles = {}
+
+    def _load(self, name):
+        return np.load(os.path.join(self.directory, name), mmap_mode='r')
+
+    @property
+    def counts(self):
+        if self._counts is None:
+            self._counts = self._load('counts.npy')
+        return self._counts
+
+    @property
+    def token_ids(self):
+        """Memory-mapped token ID stream, or None if it was not saved"""
+        if self._token_ids is None and 'token_ids.npy' in self.manifest['files']:
+            self._token_ids = self._load('token_ids.npy')
+        return self._token_ids
+
+    def word(self, word_id):
+        """Decode a single word from the vocabulary table"""
+        if self._offsets is None:
+            self._offsets = self._load('vocab_offsets.npy')
+            with open(os.path.join(self.directory, 'vocab.bin'), 'rb') as f:
+                if os.fstat(f.fileno()).st_size:
+                    self._vocab_bytes = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                else:
+                    self._vocab_bytes = b''
+        start, end = self._offsets[word_id], self._offsets[word_id + 1]
+        return self._vocab_bytes[start:end].decode('utf-8')
+
+    @property
+    def id_to_word(self):
+        return [self.word(i) for i in range(self.vocab_size)]
+
+    @property
+    def vocabulary(self):
+        """Full word -> count dict (decodes the whole vocabulary once)"""
+        if self._vocabulary is None:
+            self._vocabulary = dict(zip(self.id_to_word, self.counts.tolist()))
+        return self._vocabulary
+
+    @property
+    def rank_index(self):
+        """RankIndex from rank_ids.npy, or sorted once from the counts"""
+        if self._rank_index is None:
+            order = None
+            if 'rank_ids.npy' in self.manifest['files']:
+                order = self._load('rank_ids.npy')
+            self._rank_index = RankIndex(self.counts, order)
+        return self._rank_index
+
+    def get_top_words(self, n=20):
+        """Get top N frequent words, decoding only those N words"""
+        ids, counts = self.rank_index.top(n)
+        return {self.word(i): int(c) for i, c in zip(ids, counts)}
+
+    def get_rank(self, word):
+        """1-based frequency rank of a word, or None if it is not in the vocabulary"""
+        if self._word_to_id is None:
+            self._word_to_id = {w: i for i, w in enumerate(self.id_to_word)}
+        word_id = self._word_to_id.get(word)
+        return None if word_id is None else self.rank_index.rank_of(word_id)
+
+    def rank_frequency(self, n=None):
+        """Frequencies by rank, optionally only the top n"""
+        return self.rank_index.rank_frequency(n)
+
+    @property
+    def tfidf(self):
+        """TfidfIndex over the saved chapters, or None if they were not saved"""
+        if self._tfidf is None and 'doc_offsets.npy' in self.manifest['files'] \
+                and self.token_ids is not None:
+            doc_offsets = self._load('doc_offsets.npy')
+            if len(doc_offsets) > 1:
+                self._tfidf = TfidfIndex(self.token_ids, doc_offsets, self.vocab_size,
+                                         self.manifest.get('documents'))
+        return self._tfidf
+
+    def get_top_tfidf_words(self, n=20):
+        """Get the N words with the highest TF-IDF scores, or {} without chapters"""
+        if self.tfidf is None:
+            return {}
+        ids, scores = self.tfidf.top(n)
+        return {self.word(i): s for i, s in zip(ids.tolist(), scores.tolist())}
+
+    def get_chapter_top_terms(self, n=10):
+        """Each chapter's n highest-weighted TF-IDF terms as (chapter, {word: weight})"""
+        if self.tfidf is None:
+            return []
+        chapters = []
+        for doc, name in enumerate(self.tfidf.doc_names):
+            ids, weights = self.tfidf.document_top(doc, n)
+            chapters.append((name, {self.word(i): w for i, w in zip(ids.tolist(), weights.tolist())}))
+        return chapters
+
+    def lexical_diversity_profile(self, window=DEFAULT_WINDOW):
+        """Growth curve, MATTR and Heaps' law fit, or None without a token stream"""
+        if self.token_ids is None or not self.token_count:
+            return None
+        if window not in self._profiles:
+            self._profiles[window] = diversity_profile(self.token_ids, self.vocab_size, window)
+        return self._profiles[window]
+
+    def calculate_lexical_diversity(self):
+        """Calculate Type-Token Ratio (TTR)"""
+        if self.token_count > 0:
+            return self.vocab_size / self.token_count
+        return 0
+
+
+def load_results(directory):
+    """Open a saved results directory without reading its arrays"""
+    return ResultsView(directory)
+
+
+def convert_legacy_pickle(pickle_path, directory, language):
+    """
+    One-off conversion of an old results pickle to the new format.
+    Only use this on pickles you produced yourself: unpickling runs
+    arbitrary code from the file.
+    """
+    with open(pickle_path, 'rb') as f:
+        data = pickle.load(f)
+
+    vocabulary = data['vocabulary']
+    id_to_word = list(vocabulary)
+    counts = np.fromiter(vocabulary.values(), dtype=np.int64, count=len(vocabulary))
+
+    if 'token_ids' in data:
+        token_ids = data['token_ids']
+        word_to_id = {word: i for i, word in enumerate(id_to_word)}
+        remap = np.array([word_to_id[word] for word in data['id_to_word']], dtype=np.uint32)
+        token_ids = remap[token_ids]
+    else:
+        word_to_id = {word: i for i, word in enumerate(id_to_word)}
+        token_ids = np.fromiter((word_to_id[token] for token in data['processed_tokens']),
+                                dtype=np.uint32)
+
+    save_results(directory, language, id_to_word, counts, token_ids)
+    print(f"Converted {pickle_path} -> {directory}")
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) != 4:
+        print("Usage: python results_store.py <results.pkl> <output_dir> <language>")
+        sys.exit(1)
+    convert_legacy_pickle(sys.argv[1], sys.argv[2], sys.argv[3])
@@ -0,0 +1,219 @@
+"""
+Fixed-memory probabilistic counting for very large corpora
+
+CountMinSketch       approximate word frequencies
+HyperLogLog          approximate number of distinct words (vocabulary size)
+VocabularySketch     both of the above plus a Count-Min driven top-k
+                     heavy-hitters heap for the most frequent words
+
+Error bounds (N = total tokens):
+    Count-Min with width w and depth d never underestimates; with
+    probability at least 1 - exp(-d) each estimate exceeds the true count
+    by at most (e / w) * N.
+    HyperLogLog with 2**p registers has a relative standard error of about
+    1.04 / sqrt(2**p) (0.81% for p = 14).
+    Top-k heavy hitters: any word whose true count exceeds the k-th largest
+    count by more than the Count-Min error is reported.
+"""
+
+import hashlib
+import heapq
+import math
+from collections import Counter
+
+import numpy as np
+
+
+def hash64(word):
+    """Stable 64-bit hash of a word (Python's hash() is salted per process)"""
+    return int.from_bytes(hashlib.blake2b(word.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class CountMinSketch:
+    """Count-Min sketch: `depth` rows of `width` uint32 counters"""
+
+    def __init__(self, width=2 ** 16, depth=4):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.uint32)
+        self._rows = np.arange(depth, dtype=np.uint64)[:, None]
+
+    @classmethod
+    def from_error(cls, epsilon, delta):
+        """Size the sketch for error epsilon * N with probability 1 - delta"""
+        return cls(width=math.ceil(math.e / epsilon), depth=math.ceil(math.log(1 / delta)))
+
+    def _columns(self, hashes):
+        # Double hashing: column_i = (h1 + i * h2) mod width
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+        return (h1[None, :] + self._rows * h2[None, :]) % np.uint64(self.width)
+
+    def add(self, hashes, counts):
+        """Add counts for a batch of word hashes"""
+        columns = self._columns(hashes).astype(np.intp)
+        counts = np.asarray(counts, dtype=np.uint32)
+        for row in range(self.depth):
+            np.add.at(self.table[row], columns[row], counts)
+
+    def estimate(self, hashes):
+        """Estimated counts (upper bounds) for a batch of word hashes"""
+        columns = self._columns(hashes).astype(np.intp)
+        return self.table[np.arange(self.depth)[:, None], columns].min(axis=0)
+
+    def merge(self, other):
+        self.table += other.table
+
+    @property
+    def nbytes(self):
+        return self.table.nbytes
+
+
+class HyperLogLog:
+    """HyperLogLog distinct counter with 2**precision one-byte registers"""
+
+    def __init__(self, precision=14):
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+        self.alpha = 0.7213 / (1 + 1.079 / self.m)
+
+    def add(self, hashes):
+        """Add a batch of word hashes"""
+        p = self.precision
+        value_bits = 64 - p
+        mask = (1 << value_bits) - 1
+        index = np.empty(len(hashes), dtype=np.intp)
+        rank = np.empty(len(hashes), dtype=np.uint8)
+        for i, h in enumerate(hashes):
+            index[i] = h >> value_bits
+            rank[i] = value_bits - (h & mask).bit_length() + 1
+        np.maximum.at(self.registers, index, rank)
+
+    def estimate(self):
+        """Estimated number of distinct items"""
+        raw = self.alpha * self.m * self.m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * self.m and zeros:
+            # Small-range correction (linear counting)
+            return self.m * math.log(self.m / zeros)
+        return raw
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    @property
+    def relative_error(self):
+        return 1.04 / math.sqrt(self.m)
+
+    @property
+    def nbytes(self):
+        return self.registers.nbytes
+
+
+class VocabularySketch:
+    """
+    Fixed-memory replacement for an exact Counter over all word types:
+    Count-Min for frequencies, a min-heap of the `top_k` words with the
+    largest Count-Min estimates, and HyperLogLog for the vocabulary size.
+    Tokens are counted exactly within each batch first, so each distinct
+    word in a batch is hashed once.
+    """
+
+    def __init__(self, width=2 ** 16, depth=4, top_k=1000, precision=14, batch_size=1 << 16):
+        self.cms = CountMinSketch(width, depth)
+        self.hll = HyperLogLog(precision)
+        self.top_k = top_k
+        self.batch_size = batch_size
+        self.total = 0
+        self.candidates = {}
+        self._heap = []
+
+    def update(self, tokens):
+        """Count an iterable of tokens in batches of batch_size"""
+        batch = Counter()
+        size = 0
+        for token in tokens:
+            batch[token] += 1
+            size += 1
+            if size >= self.batch_size:
+                self.add_counts(batch)
+                batch = Counter()
+                size = 0
+        if batch:
+            self.add_counts(batch)
+
+    def add_counts(self, word_freq):
+        """Add a Counter of word frequencies"""
+        words = list(word_freq)
+        hashes = [hash64(word) for word in words]
+        self.cms.add(hashes, list(word_freq.values()))
+        self.hll.add(hashes)
+        self.total += sum(word_freq.values())
+
+        for word, estimate in zip(words, self.cms.estimate(hashes).tolist()):
+            self._offer(word, estimate)
+
+    def _offer(self, word, estimate):
+        """Keep `word` among the top-k candidates if its estimate is large enough"""
+        candidates = self.candidates
+        heap = self._heap
+        if word in candidates or len(candidates) < self.top_k:
+            candidates[word] = estimate
+            heapq.heappush(heap, (estimate, word))
+        else:
+            # Drop stale heap entries (estimates only grow) to find the minimum
+            while heap and candidates.get(heap[0][1]) != heap[0][0]:
+                heapq.heappop(heap)
+            if estimate <= heap[0][0]:
+                return
+            _, evicted = heapq.heapreplace(heap, (estimate, word))
+            del candidates[evicted]
+            candidates[word] = estimate
+
+        if len(heap) > 4 * self.top_k:
+            self._heap = [(count, w) for w, count in candidates.items()]
+            heapq.heapify(self._heap)
+
+    def estimate_count(self, word):
+        """Estimated frequency of any word (never an underestimate)"""
+        return int(self.cms.estimate([hash64(word)])[0])
+
+    def vocab_size(self):
+        """Estimated number of distinct words"""
+        return int(round(self.hll.estimate()))
+
+    def top_words(self, n=None):
+        """Heavy hitters as (word, estimated count), most frequent first"""
+        ranked = sorted(self.candidates.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:n]
+
+    def merge(self, other):
+        """Merge a sketch with the same configuration (e.g. from another shard)"""
+        if ((self.cms.width, self.cms.depth, self.hll.precision, self.top_k)
+                != (other.cms.width, other.cms.depth, other.hll.precision, other.top_k)):
+            raise ValueError("Cannot merge sketches with different width, depth, "
+                             "precision or top_k")
+        self.cms.merge(other.cms)
+        self.hll.merge(other.hll)
+        self.total += other.total
+        words = list(set(self.candidates) | set(other.candidates))
+        estimates = self.cms.estimate([hash64(word) for word in words]).tolist()
+        self.candidates = {}
+        self._heap = []
+        for word, estimate in sorted(zip(words, estimates), key=lambda item: item[1], reverse=True):
+            self._offer(word, estimate)
+
+    def error_bounds(self):
+        """Documented error bounds for the current configuration"""
+        return {
+            'count_additive_error': math.e / self.cms.width * self.total,
+            'count_confidence': 1 - math.exp(-self.cms.depth),
+            'vocab_size_relative_std_error': self.hll.relative_error,
+        }
+
+    @property
+    def nbytes(self):
+        """Approximate fixed memory use in bytes (excluding the top-k words)"""
+        return self.cms.nbytes + self.hll.nbytes
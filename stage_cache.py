@@ -0,0 +1,64 @@
+"""
+Content-addressed cache for pipeline stage outputs
+
+Each stage output is stored under a key derived from the stage name, a digest
+of the stage's input and the stage's configuration. Changing the input or any
+configuration value changes the key, so only that stage and the stages after
+it are recomputed.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+
+STAGE_CACHE_DIR = os.path.join('.cache', 'stages')
+
+
+def digest_text(text):
+    """SHA-256 hex digest of a string"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class StageCache:
+    """
+    Stores text outputs as files and directory outputs (such as saved
+    results) as directories under root/<stage>/<key>.
+    """
+
+    def __init__(self, root=STAGE_CACHE_DIR):
+        self.root = root
+
+    def key(self, stage, input_digest, config=None):
+        """Cache key for a stage run: hash of stage name, input and config"""
+        payload = json.dumps({'stage': stage, 'input': input_digest, 'config': config},
+                             sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def path(self, stage, key):
+        return os.path.join(self.root, stage, key)
+
+    def load_text(self, stage, key):
+        """Return the cached text output, or None on a cache miss"""
+        path = self.path(stage, key) + '.txt'
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def save_text(self, stage, key, text):
+        path = self.path(stage, key) + '.txt'
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(path + '.tmp', path)
+
+    def has_dir(self, stage, key, marker):
+        """True if a directory output exists and contains its completion marker"""
+        return os.path.exists(os.path.join(self.path(stage, key), marker))
+
+    def clear(self, stage=None):
+        """Remove all cached outputs, or only those of one stage"""
+        path = self.root if stage is None else os.path.join(self.root, stage)
+        if os.path.exists(path):
+            shutil.rmtree(path)
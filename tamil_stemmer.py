@@ -0,0 +1,226 @@
+"""
+Rule-based Tamil suffix stripper
+
+Tamil is agglutinative: a noun such as மரம் (tree) appears as மரத்தை,
+மரத்தில், மரங்கள், மரங்களையும் and so on, and every one of these surface
+forms counts as its own vocabulary type. English tokens are lemmatized
+before counting, so comparing vocabulary sizes without normalizing Tamil
+overstates its lexical richness.
+
+TamilStemmer strips the common inflectional suffixes. The rule list is
+small: the `ும்` clitic, case markers (with the oblique forms -த்து,
+-ட்டு, -ற்று and the ய/வ glides after vowel stems), plural கள் and the
+person endings of finite verbs. Each rule is a (suffix, replacement)
+pair. A suffix that starts with a vowel sign leaves a bare consonant
+behind, so its replacement puts back the pulli (அவனை -> அவன்). Only the
+longest matching suffix is considered, and rules are applied repeatedly,
+so stacked suffixes come off one layer per pass (மரங்களிலும் -> மரங்களில்
+-> மரங்கள் -> மரம்). A rule that leaves a vowel-final stem (a glide, the
+plural கள், a verb ending) is the last layer: the vowel it exposes belongs
+to the stem (தலையை -> தலை, குழந்தைகள் -> குழந்தை). A short list of
+pronouns and conjunctions that only look inflected is left alone.
+
+The rules are compiled into a trie of reversed suffixes, so one walk back
+from the end of a word finds every matching rule. Results are memoized per
+surface form: a book has a few tens of thousands of distinct forms, so
+after the first chapters almost every token is a single dict lookup.
+"""
+
+import hashlib
+import json
+
+PULLI = '்'
+
+# Vowel signs and other combining marks of the Tamil block
+_MARKS = frozenset('ஂாிீுூெேைொோௌ'
+                   '்ௗ')
+
+# Case markers as written after a consonant (they start with a vowel sign)
+CASE_MARKERS = (
+    'ை',                                 # accusative
+    'ுக்கு',                              # dative
+    'ின்', 'ினுடைய', 'ுடைய',               # genitive
+    'ால்', 'ினால்',                        # instrumental
+    'ில்', 'ினில்', 'ிடம்',                 # locative
+    'ிலிருந்து', 'ிடமிருந்து',               # ablative
+    'ோடு', 'ுடன்',                        # sociative
+)
+
+# Hard consonants doubled at the end of a word before the next word
+# (புத்தகத்தைப் படித்தான்)
+SANDHI_CONSONANTS = ('க்', 'ச்', 'த்', 'ப்')
+
+# Oblique stems before case markers: மரம் -> மரத்து-, வீடு -> வீட்டு-
+OBLIQUE_STEMS = (('த்த', 'ம்'), ('ட்ட', 'டு'), ('ற்ற', 'று'))
+
+# Glides between a vowel-final stem and a vowel: தலை -> தலையை, பூ -> பூவை
+GLIDES = ('ய', 'வ')
+
+PLURAL_RULES = (('கள்', ''), ('க்கள்', ''), ('ங்கள்', 'ம்'))
+PLURAL_SUFFIXES = frozenset(suffix for suffix, _ in PLURAL_RULES)
+
+# The ும் clitic ("also", "and"); after a vowel stem it comes with a glide
+CLITIC_RULES = (('ும்', PULLI), ('யும்', ''), ('வும்', ''))
+
+# Person/number endings of finite verbs (சொன்னான் -> சொன்ன)
+VERB_RULES = (('ான்', ''), ('ாள்', ''), ('ார்', ''), ('ேன்', ''), ('ோம்', ''), ('ீர்', ''))
+
+# Frequent pronouns, conjunctions and particles whose endings look like
+# suffixes (மற்றும் "and" is not மற்று + ும்). They are never stripped,
+# and stripping stops when a word is reduced to one of them.
+PROTECTED_WORDS = frozenset({
+    'மற்றும்', 'ஆனால்', 'மேலும்', 'இன்னும்', 'மிகவும்', 'எனவே', 'ஆகவே', 'இல்லை',
+    'அதனால்', 'என்றால்', 'வேண்டும்', 'நீங்கள்', 'உங்கள்', 'நாங்கள்', 'எங்கள்',
+})
+
+# A rule whose suffix starts with a vowel sign, or a plural rule, is not
+# applied if the stem would keep fewer letters than this (நாள் stays நாள்,
+# not ந; மக்கள் "people" stays மக்கள், not ம). Other suffixes start with a
+# consonant and leave a complete syllable, so one letter is enough
+# (தலைக்கு -> தலை).
+MIN_STEM_LETTERS = 2
+
+# Part of digest(): bump when the stripping logic changes, so stems cached
+# by an older version are not reused
+STEMMER_VERSION = 2
+
+# Maximum number of suffix layers stripped from one word
+MAX_PASSES = 4
+
+
+def case_rules():
+    """(suffix, replacement) rules for every case marker and its variants"""
+    markers = list(CASE_MARKERS)
+    markers += [marker + consonant for marker in CASE_MARKERS
+                if marker[-1] in ('ை', 'ு') for consonant in SANDHI_CONSONANTS]
+    rules = [(marker, PULLI) for marker in markers]
+    rules += [(oblique + marker, stem) for oblique, stem in OBLIQUE_STEMS for marker in markers]
+    rules += [(glide + marker, '') for glide in GLIDES for marker in markers]
+    # Dative after a vowel stem (தலைக்கு)
+    rules += [('க்கு', ''), ('க்குப்', ''), ('க்குக்', '')]
+    return rules
+
+
+SUFFIX_RULES = tuple(case_rules()) + PLURAL_RULES + CLITIC_RULES + VERB_RULES
+
+# Trie key holding (replacement, minimum stem letters) of the suffix that
+# ends at a node
+_RULE = ''
+
+
+def build_suffix_trie(rules, min_letters=MIN_STEM_LETTERS):
+    """Nested dicts keyed by the characters of each suffix, last character first"""
+    trie = {}
+    for suffix, replacement in rules:
+        node = trie
+        for char in reversed(suffix):
+            node = node.setdefault(char, {})
+        minimum = min_letters if suffix[0] in _MARKS or suffix in PLURAL_SUFFIXES else 1
+        node[_RULE] = (replacement, minimum)
+    return trie
+
+
+def letter_count(text):
+    """Number of Tamil letters (characters that are not vowel signs or pulli)"""
+    return sum(1 for char in text if char not in _MARKS)
+
+
+class _Memo(dict):
+    """Dict that computes and stores missing values, so a hit is one lookup"""
+
+    def __init__(self, compute):
+        super().__init__()
+        self.compute = compute
+
+    def __missing__(self, key):
+        value = self[key] = self.compute(key)
+        return value
+
+
+class TamilStemmer:
+    """
+    Memoized Tamil suffix stripper (see the module docstring).
+    stemmer(token) returns the stem of one token, stem_tokens(tokens) of a
+    list. Only the rules and settings are pickled, not the memo.
+    """
+
+    def __init__(self, rules=SUFFIX_RULES, min_letters=MIN_STEM_LETTERS, max_passes=MAX_PASSES,
+                 protected=PROTECTED_WORDS):
+        self.rules = tuple(rules)
+        self.min_letters = min_letters
+        self.max_passes = max_passes
+        self.protected = frozenset(protected)
+        self._trie = build_suffix_trie(self.rules, min_letters)
+        self._memo = _Memo(self.stem_uncached)
+
+    def __getstate__(self):
+        return {'rules': self.rules, 'min_letters': self.min_letters,
+                'max_passes': self.max_passes, 'protected': self.protected}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __len__(self):
+        """Number of distinct surface forms stemmed so far"""
+        return len(self._memo)
+
+    def __call__(self, token):
+        return self._memo[token]
+
+    def stem_tokens(self, tokens):
+        """Stems of a sequence of tokens, as a list"""
+        memo = self._memo
+        return [memo[token] for token in tokens]
+
+    def strip_once(self, word):
+        """
+        Apply the longest matching rule and return (stem, replacement), or
+        None if no rule matches or the stem would be too short. A shorter
+        match is not tried instead: மக்கள் is not மக் + கள்.
+        """
+        node = self._trie
+        match = None
+        # Walk the reversed suffixes back from the last character; a deeper
+        # match is a longer suffix, so the last one wins
+        for i in range(len(word) - 1, 0, -1):
+            node = node.get(word[i])
+            if node is None:
+                break
+            rule = node.get(_RULE)
+            if rule is not None:
+                match = i, rule
+        if match is None:
+            return None
+        i, (replacement, minimum) = match
+        stem = word[:i] + replacement
+        if letter_count(stem) < minimum:
+            return None
+        return stem, replacement
+
+    def stem_uncached(self, word):
+        """Strip up to max_passes suffix layers from a word"""
+        for passes in range(self.max_passes):
+            if word in self.protected:
+                break
+            # A final ை exposed by an earlier pass is part of the stem
+            if passes and word.endswith('ை'):
+                break
+            match = self.strip_once(word)
+            if match is None or match[0] == word:
+                break
+            word, replacement = match
+            # The rule left a vowel-final stem, so no suffix layer is left
+            if not replacement:
+                break
+        return word
+
+    def digest(self):
+        """Hash of the rules and settings (part of the stage cache key)"""
+        payload = json.dumps([STEMMER_VERSION, self.rules, self.min_letters, self.max_passes,
+                              sorted(self.protected)], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def report(self):
+        """Print how many surface forms were reduced to how many stems"""
+        print(f"Tamil stemmer: {len(self)} surface forms -> "
+              f"{len(set(self._memo.values()))} stems")
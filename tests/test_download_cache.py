@@ -0,0 +1,161 @@
+import gzip
+import http.server
+import os
+import threading
+
+import pytest
+
+from download_cache import DownloadCache, DownloadError
+
+BODY = ('Chapter one. ' * 20000).encode('utf-8')
+
+
+class StandIn(http.server.BaseHTTPRequestHandler):
+    """Local stand-in for a file server with ETags, Range requests and gzip"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        if self.headers.get('If-None-Match') == server.etag:
+            self.send_response(304)
+            self.send_header('ETag', server.etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        status, start = 200, 0
+        byte_range = self.headers.get('Range')
+        if byte_range and self.headers.get('If-Range') == server.etag:
+            status, start = 206, int(byte_range.split('=')[1].rstrip('-'))
+            if start >= len(server.body):
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{len(server.body)}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+        data = server.body[start:]
+        if server.gzip_always:
+            # Misbehaving server: compresses even when asked for identity
+            data = gzip.compress(data)
+        self.send_response(status)
+        self.send_header('ETag', server.etag)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        if server.gzip_always:
+            self.send_header('Content-Encoding', 'gzip')
+        self.end_headers()
+
+        if server.drop_after is not None:
+            # Simulate a dropped connection part-way through the body
+            self.wfile.write(data[:server.drop_after])
+            self.wfile.flush()
+            server.drop_after = None
+            self.close_connection = True
+            return
+        self.wfile.write(data)
+
+
+@pytest.fixture
+def server():
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), StandIn)
+    server.daemon_threads = True
+    server.body = BODY
+    server.etag = '"v1"'
+    server.gzip_always = False
+    server.drop_after = None
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    server.url = f'http://127.0.0.1:{server.server_port}/book.txt'
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DownloadCache(root=str(tmp_path), retries=2, backoff=0, timeout=5)
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_downloads_and_asks_for_identity(server, cache):
+    path = cache.fetch(server.url)
+    assert read(path) == BODY
+    assert server.requests[0]['Accept-Encoding'] == 'identity'
+    assert cache.metadata(server.url)['etag'] == '"v1"'
+
+
+def test_revalidates_with_etag(server, cache):
+    path = cache.fetch(server.url)
+    assert cache.fetch(server.url) == path
+    assert server.requests[-1]['If-None-Match'] == '"v1"'
+    assert read(path) == BODY
+
+
+def test_refetches_changed_body(server, cache):
+    cache.fetch(server.url)
+    server.body, server.etag = b'new text', '"v2"'
+    assert read(cache.fetch(server.url)) == b'new text'
+
+
+def test_resumes_with_range_and_if_range(server, cache):
+    # Cut after two whole chunks, so exactly that much is on disk
+    server.drop_after = 2 * cache.chunk_size
+    path = cache.fetch(server.url)
+    assert read(path) == BODY
+    resumed = server.requests[-1]
+    assert resumed['Range'] == f'bytes={2 * cache.chunk_size}-'
+    assert resumed['If-Range'] == '"v1"'
+
+
+def test_restarts_when_body_changed_during_resume(server, cache):
+    server.drop_after = 100000
+    with pytest.raises(DownloadError):
+        DownloadCache(root=cache.root, retries=0, timeout=5).fetch(server.url)
+    server.body, server.etag = BODY[::-1], '"v2"'
+    assert read(cache.fetch(server.url)) == BODY[::-1]
+
+
+def test_restarts_when_partial_body_is_complete(server, cache):
+    # A crash between the last write and the rename leaves the whole body in .part
+    _, _, part_path, part_meta_path = cache._paths(server.url)
+    with open(part_path, 'wb') as f:
+        f.write(BODY)
+    cache._write_json(part_meta_path, {'etag': '"v1"', 'last_modified': None,
+                                       'encoding': 'utf-8', 'resumable': True})
+    path = DownloadCache(root=cache.root, retries=0, timeout=5).fetch(server.url)
+    assert read(path) == BODY
+    assert server.requests[0]['Range'] == f'bytes={len(BODY)}-'
+    assert 'Range' not in server.requests[1]
+    assert not os.path.exists(part_path) and not os.path.exists(part_meta_path)
+
+
+def test_compressed_response(server, cache):
+    server.gzip_always = True
+    assert read(cache.fetch(server.url)) == BODY
+
+
+def test_compressed_response_is_not_resumed_by_offset(server, cache):
+    server.gzip_always = True
+    server.drop_after = 500
+    assert read(cache.fetch(server.url)) == BODY
+    assert 'Range' not in server.requests[-1]
+
+
+def test_offline_uses_cache_only(server, cache, tmp_path):
+    offline = DownloadCache(root=str(tmp_path), offline=True)
+    with pytest.raises(DownloadError):
+        offline.fetch(server.url)
+    cache.fetch(server.url)
+    count = len(server.requests)
+    assert read(offline.fetch(server.url)) == BODY
+    assert len(server.requests) == count
@@ -0,0 +1,29 @@
+import os
+import subprocess
+import sys
+
+from benchmarks import IMPORT_PROBE, LAZY_MODULES
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds; the same default budget as `benchmarks.py import-time`
+IMPORT_BUDGET = 0.5
+
+
+def probe_import():
+    """(seconds, eagerly loaded heavy modules) of one import in a fresh interpreter"""
+    output = subprocess.run([sys.executable, '-c', IMPORT_PROBE.format(modules=LAZY_MODULES)],
+                            cwd=ROOT, capture_output=True, text=True, check=True).stdout.split()
+    return float(output[0]), output[1].split(',') if len(output) > 1 else []
+
+
+def test_import_loads_no_heavy_dependencies():
+    _, loaded = probe_import()
+    assert loaded == []
+    assert {'nltk', 'sklearn', 'scipy', 'matplotlib'} <= set(LAZY_MODULES)
+
+
+def test_import_within_budget():
+    # Best of three, so one slow start on a busy machine does not fail the test
+    best = min(probe_import()[0] for _ in range(3))
+    assert best <= IMPORT_BUDGET, f"import took {best * 1000:.0f} ms"
@@ -0,0 +1,43 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from nlp_vocabulary_analysis import LemmaCache
+
+
+def test_update_adds_most_recent_and_evicts_oldest():
+    cache = LemmaCache(max_size=3)
+    cache.update([('cats', 'cat'), ('dogs', 'dog')])
+    cache.update([('mice', 'mouse'), ('cats', 'cat'), ('geese', 'goose')])
+    assert list(cache.entries) == ['mice', 'cats', 'geese']
+
+
+def test_concurrent_saves_leave_a_valid_file(tmp_path):
+    path = str(tmp_path / 'lemma_cache.json')
+
+    def save(i):
+        cache = LemmaCache()
+        cache.update((f'word{i}-{j}', f'lemma{j}') for j in range(2000))
+        for _ in range(10):
+            cache.save(path)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(save, range(8)))
+
+    with open(path, 'r', encoding='utf-8') as f:
+        assert len(json.load(f)['entries']) == 2000
+    assert os.listdir(tmp_path) == ['lemma_cache.json']
+
+
+def test_round_trip_keeps_lru_order(tmp_path):
+    path = str(tmp_path / 'lemma_cache.json')
+    cache = LemmaCache(path=path)
+    cache.update([('ran', 'run'), ('better', 'good')])
+    cache.save()
+    assert list(LemmaCache(path=path).entries.items()) == [('ran', 'run'), ('better', 'good')]
+
+
+def test_unreadable_file_is_ignored(tmp_path):
+    path = tmp_path / 'lemma_cache.json'
+    path.write_text('{"version": 1, "entries": [["ca', encoding='utf-8')
+    assert len(LemmaCache(path=str(path))) == 0
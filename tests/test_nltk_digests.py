@@ -0,0 +1,56 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def nltk_data(tmp_path, monkeypatch):
+    data = tmp_path / 'nltk_data'
+    (data / 'corpora' / 'stopwords').mkdir(parents=True)
+    (data / 'corpora' / 'stopwords' / 'english').write_text('the\nand\nof\n', encoding='utf-8')
+    monkeypatch.setenv('NLTK_DATA', str(data))
+    return data
+
+
+def digests_in_subprocess(path):
+    """nltk_data_digests() in a fresh interpreter, plus whether it imported NLTK"""
+    code = ('import json, sys; import nlp_vocabulary_analysis as m; '
+            f'd = m.nltk_data_digests({str(path)!r}); '
+            "print(json.dumps([d, 'nltk' in sys.modules]))")
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def test_recorded_digests_skip_nltk(nltk_data, tmp_path):
+    path = tmp_path / 'nltk_digests.json'
+    digests, imported = digests_in_subprocess(path)
+    assert imported
+    assert digests_in_subprocess(path) == [digests, False]
+
+
+def test_changed_stopwords_are_recomputed(nltk_data, tmp_path):
+    path = tmp_path / 'nltk_digests.json'
+    digests, _ = digests_in_subprocess(path)
+    (nltk_data / 'corpora' / 'stopwords' / 'english').write_text('the\nand\n', encoding='utf-8')
+    changed, imported = digests_in_subprocess(path)
+    assert imported
+    assert changed['stopwords'] != digests['stopwords']
+
+
+def test_data_installed_later_is_picked_up(nltk_data, tmp_path):
+    # punkt_tab is missing when the digests are first recorded
+    path = tmp_path / 'nltk_digests.json'
+    digests, _ = digests_in_subprocess(path)
+    punkt = nltk_data / 'tokenizers' / 'punkt_tab' / 'english'
+    punkt.mkdir(parents=True)
+    (punkt / 'abbrev_types.txt').write_text('mr\nmrs\n', encoding='utf-8')
+    changed, imported = digests_in_subprocess(path)
+    assert imported
+    assert changed['abbreviations'] != digests['abbreviations']
+    assert changed['stopwords'] == digests['stopwords']
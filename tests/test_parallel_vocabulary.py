@@ -0,0 +1,150 @@
+import json
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks import generate_corpus
+from mapped_text import MappedText
+from nlp_vocabulary_analysis import VocabularyAnalyzer, check_nltk_resources
+from tamil_stemmer import TamilStemmer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def serial_analyzer(language, text, **options):
+    analyzer = VocabularyAnalyzer(language, **options)
+    analyzer.raw_text = text
+    if language == 'tamil':
+        analyzer.preprocess_tamil()
+    else:
+        analyzer.preprocess_english()
+    analyzer.build_vocabulary()
+    return analyzer
+
+
+def parallel_analyzer(language, source, **options):
+    analyzer = VocabularyAnalyzer(language, **options)
+    # Small chunks, so every worker gets several shards
+    analyzer.build_vocabulary_parallel(source, workers=3, chunk_chars=4000)
+    return analyzer
+
+
+def assert_same_vocabulary(serial, parallel):
+    assert parallel.vocabulary == serial.vocabulary
+    assert parallel.id_to_word == serial.id_to_word
+    assert parallel.token_count == serial.token_count
+
+
+@pytest.fixture(scope='module')
+def tamil_text():
+    with open(os.path.join(ROOT, 'tamil_text.txt'), 'r', encoding='utf-8') as f:
+        translation = f.read()
+    return generate_corpus('tamil', 200_000, seed=3) + '\n\n' + translation
+
+
+@pytest.mark.parametrize('stemmed', [False, True])
+@pytest.mark.parametrize('compact', [False, True])
+def test_tamil_matches_serial_path(tamil_text, stemmed, compact):
+    stemmer = TamilStemmer() if stemmed else None
+    serial = serial_analyzer('tamil', tamil_text, stemmer=stemmer, compact=compact)
+    parallel = parallel_analyzer('tamil', tamil_text, stemmer=stemmer)
+    assert_same_vocabulary(serial, parallel)
+
+
+def test_mapped_text_matches_serial_path(tamil_text, tmp_path):
+    path = tmp_path / 'corpus.txt'
+    path.write_text(tamil_text, encoding='utf-8')
+    serial = serial_analyzer('tamil', tamil_text)
+    with MappedText(str(path), 'utf-8', clean=False) as source:
+        parallel = parallel_analyzer('tamil', source)
+    assert_same_vocabulary(serial, parallel)
+
+
+def test_crlf_file_is_sharded(tamil_text, tmp_path, capsys):
+    # load_text keeps the \r\n line endings of a Gutenberg file
+    path = tmp_path / 'crlf.txt'
+    path.write_bytes(tamil_text.replace('\n', '\r\n').encode('utf-8'))
+    analyzer = VocabularyAnalyzer('tamil')
+    text = analyzer.load_text(str(path), clean=False)
+    assert '\r\n' in text
+
+    serial = serial_analyzer('tamil', text)
+    capsys.readouterr()
+    parallel = parallel_analyzer('tamil', text)
+    shards = int(re.search(r'\((\d+) shards\)', capsys.readouterr().out).group(1))
+    assert shards > 1
+    assert_same_vocabulary(serial, parallel)
+
+
+# Just enough NLTK data for the English pipeline: untrained Punkt, a few
+# stopwords, and a WordNet that only knows "cat" and "mouse"
+FAKE_NLTK_DATA = {
+    'corpora/stopwords/english': 'the\nand\nof\na\nhe\nshe\n',
+    'corpora/wordnet/lexnames': '00\tadj.all\t3\n',
+    'corpora/wordnet/data.adj': '  1 WordNet 3.0 Copyright 2006 by Princeton University.\n',
+    'corpora/wordnet/index.noun': 'cat n 1 0 1 0 00000001  \nmouse n 1 0 1 0 00000002  \n',
+    'corpora/wordnet/noun.exc': 'mice mouse\n',
+}
+for name in ('data.noun', 'data.verb', 'data.adv', 'index.verb', 'index.adj', 'index.adv',
+             'verb.exc', 'adj.exc', 'adv.exc', 'index.sense'):
+    FAKE_NLTK_DATA[f'corpora/wordnet/{name}'] = ''
+for name in ('abbrev_types.txt', 'collocations.tab', 'sent_starters.txt', 'ortho_context.tab'):
+    FAKE_NLTK_DATA[f'tokenizers/punkt_tab/english/{name}'] = ''
+
+# Serial and parallel English vocabularies of a file, in a fresh interpreter
+# so the fake NLTK data never leaks into this process
+ENGLISH_PROBE = """
+import contextlib, io, json, re, sys
+from nlp_vocabulary_analysis import VocabularyAnalyzer
+path, tokenizer = sys.argv[1:]
+output = io.StringIO()
+with contextlib.redirect_stdout(output):
+    serial = VocabularyAnalyzer('english', tokenizer=tokenizer)
+    serial.load_text(path, clean=False)
+    serial.preprocess_english()
+    serial.build_vocabulary()
+    parallel = VocabularyAnalyzer('english', tokenizer=tokenizer)
+    parallel.build_vocabulary_parallel(serial.raw_text, workers=3, chunk_chars=4000)
+shards = int(re.search(r'\\((\\d+) shards\\)', output.getvalue()).group(1))
+print(json.dumps([list(serial.vocabulary.items()), list(parallel.vocabulary.items()), shards]))
+"""
+
+
+@pytest.fixture
+def fake_nltk_data(tmp_path):
+    data = tmp_path / 'nltk_data'
+    for name, content in FAKE_NLTK_DATA.items():
+        (data / name).parent.mkdir(parents=True, exist_ok=True)
+        (data / name).write_text(content, encoding='utf-8')
+    return data
+
+
+@pytest.mark.parametrize('tokenizer', ['word_tokenize', 'regex'])
+def test_english_matches_serial_path_without_nltk_data(fake_nltk_data, tmp_path, tokenizer):
+    sentences = ('Mr. Smith said: "The cats and the mice aren\'t well-fed." '
+                 'She left at 5 p.m. on the U.S. ship; he didn\'t -- and the cat ran.')
+    text = generate_corpus('english', 100_000, seed=3) + '\n\n' + '\n\n'.join([sentences] * 50)
+    path = tmp_path / 'english.txt'
+    path.write_bytes(text.replace('\n', '\r\n').encode('utf-8'))
+
+    env = dict(os.environ, NLTK_DATA=str(fake_nltk_data))
+    output = subprocess.run([sys.executable, '-c', ENGLISH_PROBE, str(path), tokenizer],
+                            cwd=ROOT, env=env, check=True, capture_output=True, text=True).stdout
+    serial, parallel, shards = json.loads(output.strip().splitlines()[-1])
+    assert shards > 1
+    assert parallel == serial
+    # Stopwords were removed and the lemmatizer ran
+    vocabulary = dict(serial)
+    assert 'mouse' in vocabulary and 'mice' not in vocabulary and 'the' not in vocabulary
+
+
+@pytest.mark.skipif(bool(check_nltk_resources()), reason='NLTK data is not installed')
+@pytest.mark.parametrize('tokenizer', ['word_tokenize', 'regex'])
+def test_english_matches_serial_path(tokenizer):
+    text = generate_corpus('english', 200_000, seed=3)
+    serial = serial_analyzer('english', text, tokenizer=tokenizer)
+    parallel = parallel_analyzer('english', text, tokenizer=tokenizer)
+    assert_same_vocabulary(serial, parallel)
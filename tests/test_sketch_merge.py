@@ -0,0 +1,56 @@
+import pytest
+
+from benchmarks import generate_corpus
+from nlp_vocabulary_analysis import VocabularyAnalyzer
+from sketches import VocabularySketch
+
+
+@pytest.fixture(scope='module')
+def halves():
+    text = generate_corpus('tamil', 100_000, seed=5)
+    middle = text.index('\n\n', len(text) // 2) + 2
+    return text[:middle], text[middle:]
+
+
+def sketch_analyzer(text, top_k=20):
+    analyzer = VocabularyAnalyzer('tamil')
+    analyzer.build_vocabulary_sketch(text, VocabularySketch(width=2 ** 12, top_k=top_k))
+    return analyzer
+
+
+def assert_same_sketch_results(analyzer, whole):
+    assert analyzer.token_count == whole.token_count
+    assert analyzer.vocab_size == whole.vocab_size
+    for word in list(whole.vocabulary)[:10] + ['அவன்']:
+        assert analyzer.estimate_count(word) == whole.estimate_count(word)
+    # The same heavy-hitter counts (words tied at the k-th count may differ)
+    assert sorted(analyzer.vocabulary.values()) == sorted(whole.vocabulary.values())
+    for word, count in analyzer.vocabulary.items():
+        assert whole.estimate_count(word) == count
+
+
+def test_merge_combines_sketches(halves):
+    whole = sketch_analyzer(''.join(halves))
+    merged = sketch_analyzer(halves[0]).merge(sketch_analyzer(halves[1]))
+    assert_same_sketch_results(merged, whole)
+
+
+def test_add_text_updates_sketch(halves):
+    whole = sketch_analyzer(''.join(halves))
+    analyzer = sketch_analyzer(halves[0])
+    analyzer.add_text(halves[1])
+    assert_same_sketch_results(analyzer, whole)
+
+
+def test_merge_with_exact_counts_is_rejected(halves):
+    exact = VocabularyAnalyzer('tamil')
+    exact.build_vocabulary_streaming(halves[1])
+    with pytest.raises(ValueError, match='sketch'):
+        sketch_analyzer(halves[0]).merge(exact)
+    with pytest.raises(ValueError, match='sketch'):
+        exact.merge(sketch_analyzer(halves[0]))
+
+
+def test_merge_rejects_different_configurations(halves):
+    with pytest.raises(ValueError, match='top_k'):
+        sketch_analyzer(halves[0], top_k=20).merge(sketch_analyzer(halves[1], top_k=50))
@@ -0,0 +1,56 @@
+import pickle
+
+import pytest
+
+from tamil_stemmer import TamilStemmer
+
+
+@pytest.fixture
+def stemmer():
+    return TamilStemmer()
+
+
+@pytest.mark.parametrize('word, stem', [
+    # A vowel-final stem exposed by a glide or plural rule keeps its vowel
+    ('தலையை', 'தலை'),
+    ('குழந்தைகள்', 'குழந்தை'),
+    # Plural rules need a two-letter stem, and a shorter match is not tried instead
+    ('மக்கள்', 'மக்கள்'),
+])
+def test_does_not_overstrip(stemmer, word, stem):
+    assert stemmer(word) == stem
+
+
+@pytest.mark.parametrize('word, stem', [
+    ('அவனை', 'அவன்'),
+    ('அவனும்', 'அவன்'),
+    ('மரத்தை', 'மரம்'),
+    ('மரங்களில்', 'மரம்'),
+    ('மரங்களிலும்', 'மரம்'),
+    ('வீட்டில்', 'வீடு'),
+    ('புத்தகத்தைப்', 'புத்தகம்'),
+    ('தலைக்கு', 'தலை'),
+    ('தலையில்', 'தலை'),
+    ('சொன்னான்', 'சொன்ன'),
+])
+def test_strips_inflections(stemmer, word, stem):
+    assert stemmer(word) == stem
+
+
+@pytest.mark.parametrize('word', ['நாள்', 'மற்றும்', 'நீங்கள்', 'டால்ஸ்டாய்'])
+def test_leaves_words_alone(stemmer, word):
+    assert stemmer(word) == word
+
+
+def test_memo_matches_uncached(stemmer):
+    words = ['தலையை', 'மரங்களில்', 'தலையை', 'மக்கள்']
+    assert stemmer.stem_tokens(words) == [stemmer.stem_uncached(w) for w in words]
+    assert len(stemmer) == 3
+
+
+def test_pickle_keeps_rules_not_memo(stemmer):
+    stemmer('தலையை')
+    copy = pickle.loads(pickle.dumps(stemmer))
+    assert len(copy) == 0
+    assert copy.digest() == stemmer.digest()
+    assert copy('தலையை') == 'தலை'
@@ -0,0 +1,45 @@
+import pytest
+
+from nlp_vocabulary_analysis import VocabularyAnalyzer, iter_text_chunks
+
+
+def paragraphs(count=3000, words=('word', 'text')):
+    return [f'Paragraph {i} ' + ' '.join(words[j % len(words)] for j in range(i % 120 + 10)) + '.'
+            for i in range(count)]
+
+
+@pytest.mark.parametrize('separator', ['\n\n', '\r\n\r\n', '\n \n', '\n', ' '])
+def test_chunks_are_bounded_and_cover_the_text(separator):
+    text = separator.join(paragraphs())
+    chunks = list(iter_text_chunks(text, 64 * 1024))
+    assert ''.join(chunks) == text
+    assert len(chunks) > 1
+    assert max(map(len, chunks)) <= 64 * 1024
+
+
+def test_crlf_chunks_end_on_blank_lines():
+    text = '\r\n\r\n'.join(paragraphs())
+    chunks = list(iter_text_chunks(text, 64 * 1024))
+    assert len(chunks) == len(list(iter_text_chunks(text.replace('\r\n', '\n'), 64 * 1024)))
+    assert all(chunk.endswith('\r\n\r\n') for chunk in chunks[:-1])
+
+
+def test_long_word_is_not_split():
+    text = 'a' * 5000 + ' b c'
+    assert list(iter_text_chunks(text, 1000)) == ['a' * 5000 + ' ', 'b c']
+
+
+def test_streaming_crlf_file_matches_lf(tmp_path):
+    text = '\n\n'.join(paragraphs(words=('மரம்', 'வீடு', 'அவன்')))
+    path = tmp_path / 'crlf.txt'
+    path.write_bytes(text.replace('\n', '\r\n').encode('utf-8'))
+
+    crlf = VocabularyAnalyzer('tamil')
+    crlf.load_text(str(path), clean=False)
+    assert '\r\n' in crlf.raw_text
+    assert len(list(iter_text_chunks(crlf.raw_text))) > 1
+
+    lf = VocabularyAnalyzer('tamil')
+    lf.raw_text = text
+    vocabulary = lf.build_vocabulary_streaming()
+    assert vocabulary and crlf.build_vocabulary_streaming() == vocabulary
@@ -0,0 +1,88 @@
+import pytest
+
+from nlp_vocabulary_analysis import (FakeTranslationBackend, TextTranslator, TranslationMemory,
+                                     iter_segments, pack_segments)
+
+
+class RecordingBackend(FakeTranslationBackend):
+    """FakeTranslationBackend that keeps every payload it was sent"""
+
+    def __init__(self, merge_paragraphs=False):
+        super().__init__()
+        self.payloads = []
+        self.merge_paragraphs = merge_paragraphs
+
+    def translate(self, text):
+        self.payloads.append(text)
+        translation = super().translate(text)
+        if self.merge_paragraphs:
+            translation = translation.replace('\n\n', ' ')
+        return translation
+
+
+HEADING = 'CHAPTER ONE'
+TEXT = '\n\n'.join([HEADING, 'Well, Prince, so Genoa and Lucca are now just family estates.',
+                    HEADING, 'It was in July, 1805, and the speaker was the well-known Anna Pavlovna.',
+                    'All her invitations without exception were written in French.'])
+
+
+def translator(backend, memory=None):
+    return TextTranslator(backend=backend, workers=2, rate=0, backoff=0, memory=memory)
+
+
+def expected(text):
+    fake = FakeTranslationBackend()
+    return '\n\n'.join(fake.translate(segment) for segment, _, _, _ in iter_segments(text))
+
+
+def test_repeated_segment_is_sent_once():
+    backend = RecordingBackend()
+    result = translator(backend, TranslationMemory()).translate_text(TEXT)
+    assert result == expected(TEXT)
+    sent = '\n\n'.join(backend.payloads).split('\n\n')
+    assert sent.count(HEADING) == 1
+    assert len(sent) == 4
+
+
+def test_edit_retranslates_only_the_changed_segment(tmp_path):
+    path = str(tmp_path / 'memory.jsonl')
+    translator(RecordingBackend(), TranslationMemory(path)).translate_text(TEXT)
+
+    edited = TEXT.replace('Lucca', 'Lucca, Genoa')
+    backend = RecordingBackend()
+    memory = TranslationMemory(path)
+    result = translator(backend, memory).translate_text(edited)
+    assert result == expected(edited)
+    assert backend.payloads == ['Well, Prince, so Genoa and Lucca, Genoa are now just family estates.']
+    assert memory.hits == 4
+
+
+def test_only_misses_are_packed():
+    memory = TranslationMemory()
+    translator(RecordingBackend(), memory).translate_text('One.\n\nTwo.')
+    backend = RecordingBackend()
+    translator(backend, memory).translate_text('One.\n\nThree.\n\nTwo.\n\nFour.')
+    assert backend.payloads == ['Three.\n\nFour.']
+
+
+def test_merged_paragraphs_fall_back_to_one_call_per_segment():
+    backend = RecordingBackend(merge_paragraphs=True)
+    memory = TranslationMemory()
+    result = translator(backend, memory).translate_text(TEXT)
+    assert result == expected(TEXT)
+    assert len(memory.entries) == 4
+
+
+def test_long_paragraph_segments_are_joined_with_spaces():
+    paragraph = ' '.join(f'Sentence number {i} is here.' for i in range(40))
+    result = translator(RecordingBackend()).translate_text(paragraph, chunk_size=200)
+    assert '\n' not in result
+    assert result == FakeTranslationBackend().translate(paragraph)
+
+
+@pytest.mark.parametrize('limit', [20, 5000])
+def test_pack_segments_respects_limit(limit):
+    segments = [f'segment {i}' for i in range(30)]
+    batches = pack_segments(segments, limit)
+    assert [s for batch in batches for s in batch] == segments
+    assert all(len('\n\n'.join(batch)) <= limit for batch in batches)
@@ -0,0 +1,121 @@
+"""
+Sparse document-level TF-IDF over a processed token stream
+
+Documents are chapters: the token stream is cut at the chapter offsets
+recorded during preprocessing, counted into a CSR document-term matrix
+straight from the word IDs (nothing is re-tokenized) and weighted with
+scikit-learn's TfidfTransformer. No dense documents x vocabulary array is
+ever built, so thousands of documents are cheap. SciPy and scikit-learn
+are imported on first use.
+"""
+
+import re
+
+import numpy as np
+
+# Chapter headings in the Gutenberg text and in the Tamil translation,
+# e.g. "CHAPTER XIV" or "அத்தியாயம் XIV"
+CHAPTER_HEADING = re.compile(r'^[ \t]*(?:CHAPTER|அத்தியாயம்)[ \t]+[IVXLCDM]+\b.*$', re.MULTILINE)
+
+# Documents with fewer tokens (e.g. table-of-contents entries) are folded
+# into the document before them
+MIN_DOCUMENT_TOKENS = 20
+
+
+def iter_chapters(text):
+    """
+    Yield (name, text) pairs split at chapter headings. Text before the
+    first heading is kept as a 'FRONT MATTER' document; a text without
+    headings is a single document. Each chapter is sliced only when it is
+    reached.
+    """
+    starts = [m.start() for m in CHAPTER_HEADING.finditer(text)]
+    if not starts or starts[0] > 0:
+        starts.insert(0, 0)
+    for start, end in zip(starts, starts[1:] + [len(text)]):
+        heading = CHAPTER_HEADING.match(text, start)
+        name = heading.group().strip() if heading else 'FRONT MATTER'
+        yield name, text[start:end]
+
+
+def split_chapters(text):
+    """List of the (name, text) chapters of a text (see iter_chapters)"""
+    return list(iter_chapters(text))
+
+
+def merge_short_documents(doc_offsets, total, names=None, min_tokens=MIN_DOCUMENT_TOKENS):
+    """
+    Fold documents shorter than min_tokens into the previous document.
+    Returns the kept start offsets and their names.
+    """
+    offsets = np.asarray(doc_offsets, dtype=np.int64)
+    names = list(names) if names is not None else [str(i) for i in range(len(offsets))]
+    lengths = np.diff(np.append(offsets, total))
+
+    keep = lengths >= min_tokens
+    if len(keep):
+        keep[0] = True
+    kept = np.flatnonzero(keep)
+    # A leading empty document (no front matter) is dropped altogether
+    if len(kept) > 1 and lengths[0] == 0:
+        kept = kept[1:]
+        offsets = offsets.copy()
+        offsets[kept[0]] = 0
+    return offsets[kept], [names[i] for i in kept]
+
+
+def document_term_matrix(token_ids, doc_offsets, vocab_size):
+    """CSR matrix of term counts, one row per document"""
+    from scipy import sparse
+
+    token_ids = np.asarray(token_ids)
+    lengths = np.diff(np.append(np.asarray(doc_offsets, dtype=np.int64), len(token_ids)))
+    rows = np.repeat(np.arange(len(lengths), dtype=np.int32), lengths)
+    data = np.ones(len(token_ids), dtype=np.int32)
+    # Duplicate (document, word) entries are summed into counts
+    return sparse.csr_matrix((data, (rows, token_ids)), shape=(len(lengths), vocab_size))
+
+
+class TfidfIndex:
+    """
+    TF-IDF weights of every (document, word) pair.
+    `matrix` holds the l2-normalized weights, `idf` the per-word inverse
+    document frequencies and `scores` the corpus-level score of each word
+    (its mean weight over all documents).
+    """
+
+    def __init__(self, token_ids, doc_offsets, vocab_size, doc_names=None,
+                 min_doc_tokens=MIN_DOCUMENT_TOKENS):
+        self.doc_offsets, self.doc_names = merge_short_documents(
+            doc_offsets, len(token_ids), doc_names, min_doc_tokens)
+        self.counts = document_term_matrix(token_ids, self.doc_offsets, vocab_size)
+
+        from sklearn.feature_extraction.text import TfidfTransformer
+
+        transformer = TfidfTransformer()
+        self.matrix = transformer.fit_transform(self.counts).tocsr()
+        self.idf = transformer.idf_
+        self.scores = np.asarray(self.matrix.mean(axis=0)).ravel()
+        self._order = None
+
+    @property
+    def n_documents(self):
+        return self.matrix.shape[0]
+
+    def top(self, k):
+        """Word IDs and scores of the k highest corpus-level scores"""
+        if self._order is None:
+            self._order = np.argsort(-self.scores, kind='stable')
+        ids = self._order[:k]
+        return ids, self.scores[ids]
+
+    def document_top(self, doc, k=10):
+        """Word IDs and weights of one document's k highest-weighted terms"""
+        start, end = self.matrix.indptr[doc], self.matrix.indptr[doc + 1]
+        ids = self.matrix.indices[start:end]
+        weights = self.matrix.data[start:end]
+        if len(weights) > k:
+            best = np.argpartition(-weights, k)[:k]
+            ids, weights = ids[best], weights[best]
+        order = np.lexsort((ids, -weights))
+        return ids[order], weights[order]